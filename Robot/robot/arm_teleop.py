@@ -9,7 +9,6 @@ import yaml
 from utils.logger import get_logger
 from typing import Optional
 import threading
-import queue
 import time
 from realman_controller import RealmanController  
 
@@ -28,7 +27,10 @@ class ArmJointFollower:
         self.master = master
         self.slave = slave
         self.fps = fps
-        self._q = queue.Queue(maxsize=10)
+        # 主臂最新关节角度（单槽），从臂只跟随最新目标，不积压过期数据
+        self._latest: Optional[list] = None
+        self._latest_lock = threading.Lock()
+        self._new_joint = threading.Event()
         self._running = False
         self._master_thread: Optional[threading.Thread] = None
         self._slave_thread: Optional[threading.Thread] = None
@@ -45,24 +47,35 @@ class ArmJointFollower:
 
     def _collect_master_joints(self):
         interval = 1.0 / self.fps
+        # 按固定时间点采样，扣除读取关节的耗时，避免采样周期逐渐变长
+        next_t = time.monotonic()
         while self._running:
             try:
-                state = self.master.get_state()
-                joint = state["joint"]
-                self._q.put(joint, timeout=0.1)
+                joint = self.master.get_joint_degree()
+                with self._latest_lock:
+                    self._latest = joint
+                    self._new_joint.set()
                 self.logger.debug(f"采集到主臂关节数据: {joint}")
             except Exception as e:
                 self.logger.error(f"[Master] 采集关节出错: {e}")
-            time.sleep(interval)
+            next_t += interval
+            dt = next_t - time.monotonic()
+            if dt > 0:
+                time.sleep(dt)
+            else:
+                # 超时则从当前时刻重新计时，不连续补采
+                next_t = time.monotonic()
 
     def _apply_slave_joints(self):
         while self._running:
             try:
-                joint = self._q.get(timeout=0.5)
+                if not self._new_joint.wait(timeout=0.5):
+                    continue
+                with self._latest_lock:
+                    joint = self._latest
+                    self._new_joint.clear()
                 self.slave.set_arm_joints(joint)
                 self.logger.debug(f"设置从臂关节数据: {joint}")
-            except queue.Empty:
-                pass
             except Exception as e:
                 self.logger.error(f"[Slave] 设置关节出错: {e}")
 
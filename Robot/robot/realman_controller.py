@@ -2,6 +2,7 @@ import yaml
 from utils.logger import get_logger
 from Robotic_Arm.rm_robot_interface import *
 import time
+import functools
 import numpy as np
 from typing import List, Tuple, Dict, Any, Optional
 from dataclasses import dataclass, field
@@ -84,6 +85,10 @@ class RealmanController:
         self.arm_fang_joints = params.arm_fang_joints
         self.arm_move_speed = params.arm_move_speed
 
+        # 预绑定直线/关节两种阻塞位姿运动，调用处不再每次传 linear 参数
+        self.movel_block = functools.partial(self.set_pose_block, linear=True)
+        self.movej_block = functools.partial(self.set_pose_block, linear=False)
+
         self.write_params = rm_peripheral_read_write_params_t(
             port=1,           # 末端接口板RS485接口
             address=0,  # 线圈地址0
@@ -128,15 +133,11 @@ class RealmanController:
         将机械臂移动到零位或指定初始位置
         """
         self.logger.info(f"Moving {self.name} arm to start position...")
-        succ, state = self.robot.rm_get_current_arm_state()
-        if succ != 0:
-            self.logger.error(f"{self.name} arm is not connected or responding")
-            return False
-
         if start_angles is None:
+            # 读取初始位姿同时可判断机械臂是否在线，无需单独查询一次状态
             succ, start_angles = self.robot.rm_get_init_pose()
             if succ != 0:
-                self.logger.error(f"Failed to get initial pose for {self.name} arm")
+                self.logger.error(f"{self.name} arm is not connected or failed to get initial pose")
                 return False
 
         try:
@@ -146,7 +147,7 @@ class RealmanController:
                 succ, state = self.robot.rm_get_current_arm_state()
                 if succ == 0:
                     current_joints = state['joint']
-                    max_diff = max(abs(np.array(current_joints) - np.array(start_angles)))
+                    max_diff = float(np.max(np.abs(np.asarray(current_joints, dtype=np.float64) - np.asarray(start_angles, dtype=np.float64))))
                     if max_diff > 0.01:
                         self.logger.warning(f"{self.name} arm position differs from target by {max_diff} radians")
                 time.sleep(2)
@@ -169,6 +170,16 @@ class RealmanController:
         state = arm_state.copy()
         return state
 
+    def get_joint_degree(self) -> List[float]:
+        """
+        只读取机械臂当前关节角度，比 get_state 少读取位姿等数据，适合高频轮询
+        """
+        succ, joint = self.robot.rm_get_joint_degree()
+        if succ != 0 or joint is None:
+            self.logger.error("Failed to get joint degree")
+            raise RuntimeError("Failed to get joint degree")
+        return joint
+
     def set_arm_joints(self, joint: List[float]) -> None:
         """
         设置机械臂关节角度，直接透传给机械臂，不进行阻塞实时返回
@@ -232,6 +243,38 @@ class RealmanController:
             self.logger.error(f"Error moving robot: {str(e)}")
             raise RuntimeError(f"Error moving robot: {str(e)}")
 
+    def wait_motion_done(self, timeout: float = 3.0, interval: float = 0.05, start_timeout: float = 0.0) -> bool:
+        """
+        等待机械臂当前轨迹执行完毕
+
+        按固定间隔查询控制器当前规划类型，无规划时立即返回，
+        用于替代运动指令后固定时长的 time.sleep
+
+        Args:
+            timeout: 最长等待时间，单位秒
+            interval: 查询间隔，单位秒
+            start_timeout: 非阻塞运动指令刚下发时控制器可能尚未开始规划，
+                大于0时先最多等待这么久直到观察到轨迹开始，再等待其结束
+        Returns:
+            bool: 超时前运动已结束返回True，否则返回False
+        """
+        deadline = time.monotonic() + timeout
+        if start_timeout > 0:
+            start_deadline = min(time.monotonic() + start_timeout, deadline)
+            while time.monotonic() < start_deadline:
+                result = self.robot.rm_get_arm_current_trajectory()
+                if result['return_code'] == 0 and result['trajectory_type'] != rm_arm_current_trajectory_e.RM_NO_PLANNING_E:
+                    break
+                time.sleep(interval)
+        while True:
+            result = self.robot.rm_get_arm_current_trajectory()
+            if result['return_code'] == 0 and result['trajectory_type'] == rm_arm_current_trajectory_e.RM_NO_PLANNING_E:
+                return True
+            if time.monotonic() >= deadline:
+                self.logger.warning(f"等待机械臂运动完成超时: {timeout}s")
+                return False
+            time.sleep(interval)
+
     def set_hand_angle(self, hand_angle: List[int], block: bool = True, timeout: int = 10) -> int:
         if not self.is_hand:
             self.logger.error("当前控制器不是灵巧手，无法设置手角度")
@@ -4,7 +4,11 @@ from collections import deque
 import threading
 from utils.logger import get_logger
 from .vison_sensor import VisionSensor
-import time
+
+# 单次等待帧的超时时间（毫秒），30fps 下正常间隔约 33ms
+FRAME_WAIT_TIMEOUT_MS = 500
+# 连续超时时每隔多少次记录一次日志，500ms x 10 与原先5秒超时报错的频率相同
+FRAME_MISS_LOG_INTERVAL = 10
 
 def print_realsense_devices():
     """
@@ -85,8 +89,23 @@ class RealsenseSensor(VisionSensor):
         self.is_depth = False
         self._pipeline_started = False
         self.resolution = [640, 480]  # 默认分辨率
+        # 采集类型标志，由 set_collect_info 预先计算，采集循环中不再逐帧查找列表
+        self._want_color = False
+        self._want_depth = False
+        # 连续等待帧超时的次数，用于限制断流期间的日志频率
+        self._missed_frames = 0
         self.logger.info(f"初始化RealSense传感器: {name}")
 
+    def set_collect_info(self, collect_info):
+        """
+        设置需要采集的数据类型，并预先计算各类型的采集标志
+        Args:
+            collect_info: 需要采集的数据类型列表，如["color", "depth"]
+        """
+        super().set_collect_info(collect_info)
+        self._want_color = bool(collect_info) and "color" in collect_info
+        self._want_depth = bool(collect_info) and "depth" in collect_info
+
     def set_up(self, camera_serial: str, is_depth: bool = True, resolution: list = None):
         """
         设置RealSense相机
@@ -138,7 +157,7 @@ class RealsenseSensor(VisionSensor):
             self._pipeline_started = True
             self._start_collection()
             self.logger.info(f"相机启动成功: {self.name} (SN: {camera_serial})")
-            time.sleep(1) # 等待摄像头初始化
+            self.wait_for_frame(timeout=1.0) # 等待摄像头送出第一帧
 
         except Exception as e:
             self.logger.error(f"相机初始化失败: {str(e)}")
@@ -156,14 +175,27 @@ class RealsenseSensor(VisionSensor):
             return None
             
         try:
-            frames = self.pipeline.wait_for_frames(5000)
+            # 短超时等待：等待期间 pyrealsense2 已释放GIL，超时只返回None，
+            # 采集线程可及时响应退出事件，停止采集时不会被卡住最长5秒
+            ok, frames = self.pipeline.try_wait_for_frames(FRAME_WAIT_TIMEOUT_MS)
+            if not ok:
+                # 第一次超时立即告警，之后每 FRAME_MISS_LOG_INTERVAL 次（约5秒）才记录一次，避免断流时刷屏
+                self._missed_frames += 1
+                if self._missed_frames == 1:
+                    self.logger.warning(f"等待帧超时（{FRAME_WAIT_TIMEOUT_MS}ms）")
+                elif self._missed_frames % FRAME_MISS_LOG_INTERVAL == 0:
+                    self.logger.error(f"连续 {self._missed_frames} 次未收到帧，相机可能已断开")
+                return None
+            if self._missed_frames:
+                self.logger.info(f"恢复收到帧，此前连续超时 {self._missed_frames} 次")
+                self._missed_frames = 0
             result = {}
             
             if not self.collect_info:
                 return None
                 
             # 获取彩色图像
-            if "color" in self.collect_info:
+            if self._want_color:
                 color_frame = frames.get_color_frame()
                 if color_frame:
                     # RealSense默认输出BGR格式，直接使用，与OpenCV保持一致
@@ -173,7 +205,7 @@ class RealsenseSensor(VisionSensor):
                     self.logger.warning("未获取到彩色帧")
                     
             # 获取深度图像
-            if self.is_depth and "depth" in self.collect_info:
+            if self.is_depth and self._want_depth:
                 depth_frame = frames.get_depth_frame()
                 if depth_frame:
                     # 深度图像为16位整数，单位为毫米(mm)
@@ -1,9 +1,11 @@
 import serial
 import time
 import struct
+from utils.logger import get_logger
 
 class SerialLiftingMotor: 
     def __init__(self):
+        self.logger = get_logger("lift")
         self.ser = None  # 串口对象
         self.serial_opened = False  # 串口状态标志
 
@@ -43,30 +45,81 @@ class SerialLiftingMotor:
         # 读取数据并拼接剩余数据
         self.remaining_data += self.ser.read_all()
         print("self.remaining_data:", len(self.remaining_data))
-        buffer = self.remaining_data
 
-        # 查找数据头
-        start_index = buffer.find(b'\x01\x03\x04')
-        if start_index != -1 and len(buffer) >= start_index + 9:
-            # 取出九个字节
-            data_segment = buffer[start_index:start_index + 9]
-            self.remaining_data = buffer[start_index + 9:]  # 更新剩余数据
-
-            # 解析脉冲数
-            position_bytes = bytearray()
-            position_bytes.extend([data_segment[5], data_segment[6], data_segment[3], data_segment[4]])  # 高位存低地址
-            self.motor_positon_read = int.from_bytes(position_bytes, 'big', signed=True)
-            print("position pulse count:", self.motor_positon_read)
-
-            # 转换为距离
-            self.motor_positon_read = int(self.motor_positon_read / self.Ratio_K_2 * self.Ratio_K_1) / 1
-            print("position distance (mm):", self.motor_positon_read, flush=True)
+        position = self._parse_position()
+        if position is not None:
+            print("position distance (mm):", position, flush=True)
         else:
             print("no data")
 
+    def _parse_position(self):
+        """从接收缓冲区中解析一帧位置应答
+
+        Returns:
+            当前位置 (单位: mm)，缓冲区中还没有完整应答时返回 None
+        """
+        buffer = self.remaining_data
+        # 查找数据头
+        start_index = buffer.find(b'\x01\x03\x04')
+        if start_index == -1 or len(buffer) < start_index + 9:
+            return None
+        # 取出九个字节
+        data_segment = buffer[start_index:start_index + 9]
+        self.remaining_data = buffer[start_index + 9:]  # 更新剩余数据
+
+        # 解析脉冲数，高位存低地址
+        position_bytes = bytes([data_segment[5], data_segment[6], data_segment[3], data_segment[4]])
+        pulse = int.from_bytes(position_bytes, 'big', signed=True)
+
+        # 转换为距离
+        self.motor_positon_read = int(pulse / self.Ratio_K_2 * self.Ratio_K_1) / 1
+        return self.motor_positon_read
+
 
 
 
+    def read_position(self, timeout: float = 0.3):
+        """查询并读取一次当前位置
+
+        Args:
+            timeout: 等待应答的最长时间 (单位: s)
+
+        Returns:
+            当前位置 (单位: mm)，超时未收到完整应答时返回 None
+        """
+        self.motor_position_read()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.02)
+            self.remaining_data += self.ser.read_all()
+            position = self._parse_position()
+            if position is not None:
+                return position
+        return None
+
+    def wait_position(self, distance: int, timeout: float, tolerance: float = 2.0, interval: float = 0.2) -> bool:
+        """等待升降机到达目标位置，用于替代下发位置后固定时长的 sleep
+
+        Args:
+            distance: 目标位置 (单位: mm)，与 cmd_vel_callback 的参数一致
+            timeout: 最长等待时间 (单位: s)，超时即返回，不会比原先的固定等待更久
+            tolerance: 认为到位的误差 (单位: mm)
+            interval: 查询间隔 (单位: s)
+
+        Returns:
+            超时前到位返回 True，否则返回 False
+        """
+        if distance > self.max_lifting_distance:
+            distance = self.max_lifting_distance - 5
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            position = self.read_position()
+            if position is not None and abs(position - distance) <= tolerance:
+                return True
+            time.sleep(interval)
+        self.logger.warning(f"等待升降机到位超时（{timeout}s），目标位置: {distance}mm")
+        return False
+
     def get_motor_poition(self)->int:
         return self.motor_positon_read
 
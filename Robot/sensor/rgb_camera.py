@@ -76,6 +76,8 @@ class RgbCameraSensor(VisionSensor):
             if not self.cap.isOpened():
                 self.logger.error(f"无法打开摄像头 {self.camera_id}")
                 raise RuntimeError(f"无法打开摄像头 {self.camera_id}")
+            # 驱动缓冲只保留1帧，读取到的总是最新画面（部分后端不支持，设置失败时忽略）
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             
             self._start_collection()
             self.logger.info(f"RGB摄像头启动成功: {self.name}")
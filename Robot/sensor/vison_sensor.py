@@ -1,6 +1,5 @@
 from utils.logger import get_logger
 from .sensor_base import Sensor
-from collections import deque
 import threading
 from typing import Dict, Any, Optional
 import numpy as np
@@ -11,7 +10,7 @@ class VisionSensor(Sensor):
     
     继承自Sensor类，专门用于处理图像数据的传感器。
     支持彩色图像、深度图像和点云数据的采集。
-    实现了多线程数据采集和帧缓冲机制，具体采集逻辑由子类实现。
+    实现了多线程数据采集和最新帧发布机制，具体采集逻辑由子类实现。
     
     ===== 使用说明 =====
     
@@ -41,13 +40,14 @@ class VisionSensor(Sensor):
        sensor.cleanup()
     
     ===== 对外接口 =====
-    - __init__(buffer_size): 初始化传感器
+    - __init__(buffer_size): 初始化传感器（buffer_size 仅为兼容保留，始终只保留最新一帧）
     - set_collect_info(collect_info): 设置采集数据类型
     - _start_collection(): 启动数据采集线程
     - _stop_collection(): 停止数据采集线程
     - get_information(): 获取最新帧全部数据（非阻塞）
     - get_immediate_image(): 获取即时帧数据（阻塞）
     - get(): 根据collect_info过滤获取数据
+    - wait_for_frame(timeout): 等待采集线程送来一帧新数据
     - cleanup(): 清理资源
     
     ===== 内部方法（不应外部调用）=====
@@ -60,11 +60,13 @@ class VisionSensor(Sensor):
         self.type = "vision_sensor"
         self.collect_info = None
         self.logger = get_logger(self.name)
-        self.frame_buffer = deque(maxlen=buffer_size)
+        # 只保留最新一帧：采集线程整体替换引用发布新帧，读取方直接取引用，无需缓冲队列
+        self._latest_frame: Optional[Dict[str, np.ndarray]] = None
+        self._frame_cond = threading.Condition()
         self._thread = None
         self._exit_event = threading.Event()
         self._keep_running = False
-        self.logger.info(f"视觉传感器初始化完成，缓冲区大小: {buffer_size}")
+        self.logger.info("视觉传感器初始化完成")
 
     def _start_collection(self):
         """启动数据采集线程"""
@@ -95,7 +97,9 @@ class VisionSensor(Sensor):
             try:
                 frame = self._acquire_frame()
                 if frame:
-                    self.frame_buffer.append(frame)
+                    with self._frame_cond:
+                        self._latest_frame = frame
+                        self._frame_cond.notify_all()
             except Exception as e:
                 self.logger.error(f"采集线程异常: {str(e)}")
         self.logger.debug("采集线程结束运行")
@@ -117,10 +121,25 @@ class VisionSensor(Sensor):
         Returns:
             Optional[Dict[str, np.ndarray]]: 最新帧全部数据
         """
-        if not self.frame_buffer:
+        frame = self._latest_frame
+        if frame is None:
             self.logger.debug("缓冲区为空，无可用数据")
-            return None
-        return self.frame_buffer[-1]
+        return frame
+
+    def wait_for_frame(self, timeout: float = 2.0) -> bool:
+        """
+        等待采集线程送来一帧调用之后的新数据，用于启动或运动后的就绪判断
+        Args:
+            timeout: 最长等待时间（秒）
+        Returns:
+            bool: 超时前是否收到新帧
+        """
+        with self._frame_cond:
+            previous = self._latest_frame
+            if self._frame_cond.wait_for(lambda: self._latest_frame is not previous, timeout=timeout):
+                return True
+        self.logger.warning(f"等待新帧超时（{timeout}s）")
+        return False
 
     def get_immediate_image(self) -> Optional[Dict[str, np.ndarray]]:
         """
@@ -1,19 +1,58 @@
 #!/usr/bin/env python3
-from typing import Optional, Dict, Literal, List
-import numpy as np
-import yaml
+from typing import Optional, Dict, Literal, List, Tuple, TYPE_CHECKING
+import functools
+import json
 import os
-from dataclasses import dataclass, asdict
-from Robot.robot.realman_controller import RobotParams
+from dataclasses import dataclass, field, fields
+from utils.logger import get_logger
+
+if TYPE_CHECKING:
+    # realman_controller 会加载机械臂SDK动态库，只在真正解析配置时再导入
+    import numpy as np
+    from Robot.robot.realman_controller import RobotParams
+
+def _to_builtin(value):
+    """将numpy数组转换回Python列表，便于序列化为YAML"""
+    return value.tolist() if hasattr(value, 'tolist') else value
+
+
+def _shallow_asdict(obj) -> dict:
+    """
+    浅层转换dataclass为字典
+
+    与dataclasses.asdict不同，不会对每个字段做深拷贝，仅将numpy数组转回列表；
+    init=False 的派生字段（如内参元组intrinsics）不写回配置
+    """
+    return {f.name: _to_builtin(getattr(obj, f.name)) for f in fields(obj) if f.init}
+
+
+def _intrinsics_tuple(color_intr: Dict[str, float]) -> Tuple[float, float, float, float]:
+    """由 {ppx, ppy, fx, fy} 构造 (fx, fy, ppx, ppy) 浮点数元组"""
+    return (float(color_intr['fx']), float(color_intr['fy']),
+            float(color_intr['ppx']), float(color_intr['ppy']))
+
+
+def _homogeneous_transform(rotation_matrix, translation_vector) -> 'np.ndarray':
+    """由旋转矩阵和平移向量构造4x4齐次变换矩阵"""
+    import numpy as np
+    T = np.eye(4)
+    T[:3, :3] = rotation_matrix
+    T[:3, 3] = translation_vector
+    return T
+
 
 @dataclass
 class CameraParams:
     """相机参数类"""
     serial: str
     resolution: List[int]
-    rotation_matrix: List[List[float]]
-    translation_vector: List[float]
+    rotation_matrix: 'np.ndarray'  # (3, 3) float64，加载时一次性转换，避免抓取时反复从列表构造
+    translation_vector: 'np.ndarray'  # (3,) float64
     color_intr: Dict[str, float]  # {ppx, ppy, fx, fy}
+    # 由color_intr派生的 (fx, fy, ppx, ppy) Python浮点数，供逐点投影直接解包使用
+    intrinsics: Tuple[float, float, float, float] = field(init=False, default=None, repr=False)
+    # 由rotation_matrix和translation_vector派生的相机到末端4x4齐次变换，手眼标定固定，加载时构造一次
+    T_cam_ee: 'np.ndarray' = field(init=False, default=None, repr=False)
     
 
 
@@ -31,7 +70,7 @@ class GraspConfig:
             raise KeyError(f"相机位置 '{position}' 未在配置中找到")
         return self.cameras[position]
     
-    def get_robot_params(self, position: Literal['left', 'right']) -> RobotParams:
+    def get_robot_params(self, position: Literal['left', 'right']) -> 'RobotParams':
         """获取指定位置的机械臂参数"""
         if position not in self.robots:
             raise KeyError(f"机械臂位置 '{position}' 未在配置中找到")
@@ -45,6 +84,10 @@ class GraspConfig:
         for key, value in kwargs.items():
             if hasattr(camera, key):
                 setattr(camera, key, value)
+        if 'color_intr' in kwargs:
+            camera.intrinsics = _intrinsics_tuple(camera.color_intr)
+        if 'rotation_matrix' in kwargs or 'translation_vector' in kwargs:
+            camera.T_cam_ee = _homogeneous_transform(camera.rotation_matrix, camera.translation_vector)
     
     def update_robot_params(self, position: Literal['left', 'right'], **kwargs):
         """更新机械臂参数"""
@@ -55,14 +98,47 @@ class GraspConfig:
             if hasattr(robot, key):
                 setattr(robot, key, value)
     
+    @staticmethod
+    def _load_config_data(config_path: str) -> dict:
+        """
+        读取配置文件内容
+
+        在YAML旁维护一个 `<config_path>.cache.json` 解析缓存，
+        缓存不比YAML旧时直接读取JSON，否则重新解析YAML并刷新缓存
+        """
+        cache_path = config_path + '.cache.json'
+        try:
+            if os.path.getmtime(cache_path) >= os.path.getmtime(config_path):
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except (OSError, ValueError):
+            # 缓存不存在或已损坏，重新解析YAML
+            pass
+
+        import yaml
+        with open(config_path, 'r', encoding='utf-8') as f:
+            # 优先使用libyaml的C解析器，语义与safe_load一致
+            config_data = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+        try:
+            payload = json.dumps(config_data, ensure_ascii=False)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+        except (OSError, TypeError, ValueError):
+            # 缓存写入失败（目录只读或含有JSON不支持的类型）不影响配置加载
+            pass
+        return config_data
+
     @classmethod
     def from_yaml(cls, config_path: str) -> 'GraspConfig':
         """从YAML配置文件加载配置"""
+        import numpy as np
+        from Robot.robot.realman_controller import RobotParams
+
         if not os.path.exists(config_path):
             raise FileNotFoundError(f"配置文件不存在: {config_path}")
         
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config_data = yaml.safe_load(f)
+        config_data = _load_config_data_cached(os.path.abspath(config_path), os.stat(config_path).st_mtime)
         
         # 创建配置实例
         config = cls()
@@ -70,13 +146,17 @@ class GraspConfig:
         # 加载相机配置
         if 'cameras' in config_data:
             for position, camera_data in config_data['cameras'].items():
-                config.cameras[position] = CameraParams(
+                color_intr = camera_data['color_intr']  # 现在是 {ppx, ppy, fx, fy} 字典
+                camera = CameraParams(
                     serial=camera_data['serial'],
                     resolution=camera_data['resolution'],
-                    rotation_matrix=camera_data['rotation_matrix'],
-                    translation_vector=camera_data['translation_vector'],
-                    color_intr=camera_data['color_intr']  # 现在是 {ppx, ppy, fx, fy} 字典
+                    rotation_matrix=np.asarray(camera_data['rotation_matrix'], dtype=np.float64),
+                    translation_vector=np.asarray(camera_data['translation_vector'], dtype=np.float64),
+                    color_intr=color_intr
                 )
+                camera.intrinsics = _intrinsics_tuple(color_intr)
+                camera.T_cam_ee = _homogeneous_transform(camera.rotation_matrix, camera.translation_vector)
+                config.cameras[position] = camera
         else:
             raise ValueError("配置文件中缺少 'cameras' 配置")
         
@@ -111,12 +191,14 @@ class GraspConfig:
     
     def to_yaml(self, config_path: str):
         """保存配置到YAML文件"""
+        import yaml
+
         config_data = {
             'cameras': {
-                position: asdict(camera) for position, camera in self.cameras.items()
+                position: _shallow_asdict(camera) for position, camera in self.cameras.items()
             },
             'robots': {
-                position: asdict(robot) for position, robot in self.robots.items()
+                position: _shallow_asdict(robot) for position, robot in self.robots.items()
             },
             'rgb_camera_id': self.rgb_camera_id,
             'sam_model_path': self.sam_model_path
@@ -124,7 +206,9 @@ class GraspConfig:
         
         os.makedirs(os.path.dirname(config_path), exist_ok=True)
         with open(config_path, 'w', encoding='utf-8') as f:
-            yaml.dump(config_data, f, default_flow_style=False, allow_unicode=True, indent=2)
+            # 优先使用libyaml的C实现，未安装时回退到纯Python实现
+            dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+            yaml.dump(config_data, f, Dumper=dumper, default_flow_style=False, allow_unicode=True, indent=2)
     
     def load_config(self, config_path: str):
         """加载配置文件并更新当前实例"""
@@ -135,20 +219,35 @@ class GraspConfig:
         self.sam_model_path = new_config.sam_model_path
 
 
+@functools.lru_cache(maxsize=8)
+def _load_config_data_cached(config_path: str, mtime: float) -> dict:
+    """
+    按 (路径, 修改时间) 缓存配置文件的解析结果，文件未变化时重复加载直接复用
+
+    返回的字典在多次调用间共享，调用方不应原地修改
+    """
+    return GraspConfig._load_config_data(config_path)
+
+
 # 全局配置实例
 # 必须从配置文件加载，如果配置文件不存在则抛出异常
 _config_path = os.path.join(os.path.dirname(__file__), 'grasp_config.yaml')
-if os.path.exists(_config_path):
+
+
+@functools.lru_cache(maxsize=None)
+def get_config() -> GraspConfig:
+    """获取全局配置实例，首次调用时才读取配置文件，之后直接返回同一实例"""
+    if not os.path.exists(_config_path):
+        raise FileNotFoundError(f"配置文件不存在: {_config_path}，请确保配置文件存在并包含所有必需的配置项")
     grasp_config = GraspConfig.from_yaml(_config_path)
-    print("已加载配置:")
-    print(f"RGB相机ID: {grasp_config.rgb_camera_id}")
-    print(f"SAM模型路径: {grasp_config.sam_model_path}")
-    print("相机配置:")
+    logger = get_logger("GraspConfig")
+    logger.debug("已加载配置:")
+    logger.debug(f"RGB相机ID: {grasp_config.rgb_camera_id}")
+    logger.debug(f"SAM模型路径: {grasp_config.sam_model_path}")
+    logger.debug("相机配置:")
     for pos, camera in grasp_config.cameras.items():
-        print(f"  {pos}: 序列号={camera.serial}, 分辨率={camera.resolution}, 内参={camera.color_intr}")
-    print("机械臂配置:")
+        logger.debug(f"  {pos}: 序列号={camera.serial}, 分辨率={camera.resolution}, 内参={camera.color_intr}")
+    logger.debug("机械臂配置:")
     for pos, robot in grasp_config.robots.items():
-        print(f"  {pos}: IP={robot.ip}:{robot.port}, 速度={robot.arm_move_speed}%")
-else:
-    raise FileNotFoundError(f"配置文件不存在: {_config_path}，请确保配置文件存在并包含所有必需的配置项")
-   
+        logger.debug(f"  {pos}: IP={robot.ip}:{robot.port}, 速度={robot.arm_move_speed}%")
+    return grasp_config
@@ -2,7 +2,6 @@
 import sys
 import os
 import logging
-import cv2
 import datetime
 
 from Robot.sensor import depth_camera
@@ -13,15 +12,21 @@ from Robot.sensor.depth_camera import RealsenseSensor
 from Robot.sensor.rgb_camera import RgbCameraSensor
 from Robot.robot.realman_controller import RealmanController
 from grasp_task2.llm_quest import VisionAPI,ImageInput
-from grasp_task2.config import grasp_config
+from grasp_task2.config import get_config
 from grasp_task2.vertical_catch import vertical_catch
 from Robot.sensor.suction_sensor import SuctionController
-from typing import Tuple, Optional
-import numpy as np
-from utils.others import get_images , mark_detected_medicine_on_image
+from typing import Tuple, Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import OrderedDict
+import threading
+from utils.others import get_images , mark_detected_medicine_on_image, debug_imwrite, window_depth
+from utils.others import compute_image_key
 from utils.others import print_grasp_poses
 from Robot.sensor.lift import SerialLiftingMotor
 
+# 吸盘接触药盒后建立负压所需的停留时间（秒）
+SUCTION_SEAL_TIME = 1.5
+
 def get_timestamped_path(filename):
     """
     生成带有时间戳的文件路径，保存到logs文件夹下
@@ -49,27 +54,36 @@ def get_timestamped_path(filename):
 class GraspTask:
     def __init__(self):
         self.logger = get_logger("GraspTask")
-        self.config = grasp_config
+        self.config = get_config()
+        setup_logger()
 
         # 初始化各个模块
         self.llm_api = VisionAPI()
         # self.rgb_camera = RgbCameraSensor("rgb_camera")
 
-        self.left_camera = RealsenseSensor("left_camera")     
-        self.left_robot = RealmanController("left_robot",self.config.robots["left"])
-        # self.left_suction = None
-        
-        self.right_camera = RealsenseSensor("right_camera")
-        self.right_robot = RealmanController("right_robot",self.config.robots["right"])
-        # self.right_suction = None
+        # 相机和SAM模型在首次访问时才初始化，见下方同名属性
+        self._left_camera = None
+        self._right_camera = None
+        self._sam_model = None
+
+        # 后续药品的批量识别：当前药品同步识别后，本臂后续待抓的药品在后台线程中用同一画面批量识别，
+        # 与本次抓取的机械臂运动重叠。结果按 (机械臂, 药品名) 暂存，同一批次的药品共享同一个Future；
+        # 机械臂进入货架后画面可能已变化，丢弃该机械臂尚未使用的结果
+        self._vlm_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="vlm")
+        self._bbox_futures: Dict[Tuple[str, str], Future] = {}
+        # 大模型识别结果缓存：键为 (画面内容哈希, 药品名)，按LRU淘汰；机械臂进入货架或换层后画面可能变化，整体清空
+        self._detect_cache: "OrderedDict[Tuple[bytes, str], list]" = OrderedDict()
+        self._detect_cache_size = 32
+        self._detect_cache_lock = threading.Lock()
+
+        # 左右臂并行抓取时的共享资源保护：SAM模型及其输入缓冲区、放药区域（两臂不同时进入）
+        self._sam_lock = threading.Lock()
+        self._place_lock = threading.Lock()
 
         self.lift = SerialLiftingMotor()
         self.lift.cmd_vel_callback(380)
-        self.logger.info("移动升降机到380,开始sleep 10 秒")
-        time.sleep(10)
-    
-        # SAM模型
-        self.sam_model = None    
+        self.logger.info("移动升降机到380,等待到位（最多10秒）")
+        self.lift.wait_position(380, timeout=10)
 
         # 临时变量
         # 药品列表
@@ -80,41 +94,76 @@ class GraspTask:
         self.right_moving_joints = [-90,0,90,0,90,180]
         self.left_moving_joints = [90,0,90,0,90,-180]
 
-        self._init_components()
-        
-    def _init_components(self):
-        """初始化所有组件"""
-        try:
-            self.sam_model = SamPredictor(self.config.sam_model_path)
-            setup_logger()
-            self.left_camera.set_up(self.config.cameras["left"].serial,self.config.cameras["left"].resolution)
-            self.left_robot.set_up()
-            self.left_robot.set_arm_joints_block([87.305, -82.470, -7.278, 1.521, -72.276, -188.752])
-            # self.left_robot.set_arm_joints_block(self.left_moving_joints)
-            self.left_robot.release_suck()
-            
-            self.right_camera.set_up(self.config.cameras["right"].serial,self.config.cameras["right"].resolution)         
-            self.right_robot.set_up()
-            self.right_robot.release_suck()
-            self.right_robot.set_arm_joints_block(self.right_moving_joints)
-            time.sleep(2)
-
-            self.logger.info("所有组件初始化完成")
-            return True
-        except Exception as e:
-            self.logger.error(f"组件初始化失败: {str(e)}")
-            return False
+        # 机械臂在构造时立即连接并归位：处方拍照要求左臂已处于拍照姿态，
+        # 两臂并行抓取前也必须从已知姿态出发
+        self.left_robot = self._init_left_robot()
+        self.right_robot = self._init_right_robot()
+
+        # 调试图片（处方、识别结果、分割掩码）只在 GRASP_DEBUG_IMAGES=1 时保存到logs目录
+        self.debug_save = os.environ.get("GRASP_DEBUG_IMAGES") == "1"
+        # 调试图片在单独线程中编码写盘，不阻塞抓取流程；get_images 返回的帧已与相机缓冲区分离，后续不会原地修改
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="img_io")
+
+    @property
+    def sam_model(self) -> SamPredictor:
+        """SAM模型，首次访问时加载权重，GPU 上以 FP16 推理"""
+        if self._sam_model is None:
+            self._sam_model = SamPredictor(self.config.sam_model_path, half=True)
+        return self._sam_model
+
+    @property
+    def left_camera(self) -> RealsenseSensor:
+        """左相机，首次访问时启动"""
+        if self._left_camera is None:
+            camera = RealsenseSensor("left_camera")
+            camera.set_up(self.config.cameras["left"].serial,self.config.cameras["left"].resolution)
+            self._left_camera = camera
+        return self._left_camera
+
+    def _init_left_robot(self) -> RealmanController:
+        """连接左机械臂并移动到处方拍照姿态"""
+        robot = RealmanController("left_robot",self.config.robots["left"])
+        robot.set_up()
+        robot.set_arm_joints_block([87.305, -82.470, -7.278, 1.521, -72.276, -188.752])
+        # robot.set_arm_joints_block(self.left_moving_joints)
+        robot.release_suck()
+        self.logger.info("左机械臂初始化完成")
+        return robot
+
+    @property
+    def right_camera(self) -> RealsenseSensor:
+        """右相机，首次访问时启动"""
+        if self._right_camera is None:
+            camera = RealsenseSensor("right_camera")
+            camera.set_up(self.config.cameras["right"].serial,self.config.cameras["right"].resolution)
+            self._right_camera = camera
+        return self._right_camera
+
+    def _init_right_robot(self) -> RealmanController:
+        """连接右机械臂并移动到待机姿态"""
+        robot = RealmanController("right_robot",self.config.robots["right"])
+        robot.set_up()
+        robot.release_suck()
+        robot.set_arm_joints_block(self.right_moving_joints)
+        self.logger.info("右机械臂初始化完成")
+        return robot
+
     def cleanup(self):
         """清理资源"""
         self.logger.info("正在清理资源...")
         # if self.rgb_camera:
         #     self.rgb_camera.cleanup()
-        if self.right_camera:
-            self.right_camera.cleanup()
-        if self.left_camera:
-            self.left_camera.cleanup()
+        # 只清理已经初始化过的相机，避免清理时反而触发初始化
+        if self._right_camera:
+            self._right_camera.cleanup()
+        if self._left_camera:
+            self._left_camera.cleanup()
         # if self.right_suction:
         #     self.right_suction.close()  
+        self._bbox_futures.clear()
+        self._vlm_pool.shutdown(wait=False)
+        # 等待已提交的调试图片写完
+        self._io_pool.shutdown(wait=True)
         self.logger.info("资源清理完成")
 
     # 处方识别        
@@ -125,9 +174,10 @@ class GraspTask:
         try:
             bgr_frame = self.left_camera.get_information()['color']
             #保存图片
-            img_path = get_timestamped_path("prescription.jpg")
-            cv2.imwrite(img_path, bgr_frame)
-            self.logger.info(f"处方图片保存成功: {img_path}")
+            if self.debug_save:
+                img_path = get_timestamped_path("prescription.jpg")
+                self._io_pool.submit(debug_imwrite, img_path, bgr_frame)
+                self.logger.info(f"处方图片保存: {img_path}")
             self.medicine_list  = self.llm_api.extract_prescription_medicines(ImageInput(image_np=bgr_frame))
             self.logger.info(f"识别到的药品: {self.medicine_list}")
 
@@ -136,8 +186,45 @@ class GraspTask:
                 self.left_robot.set_arm_joints_block(self.left_moving_joints)
         return self.medicine_list
 
+    def _detect_cached(self, image_input: ImageInput, medicine_name: str) -> list:
+        """
+        带缓存的药品识别，相同画面和药品名直接返回上次的有效结果
+
+        Args:
+            image_input: 包含BGR图像的输入，同一帧复用同一个ImageInput以共享JPEG/base64编码结果
+            medicine_name: 药品名称
+
+        Returns:
+            list: 边界框 [x1, y1, x2, y2]
+        """
+        key = (compute_image_key(image_input.image_np), medicine_name)
+        with self._detect_cache_lock:
+            bbox = self._detect_cache.get(key)
+            if bbox is not None:
+                self._detect_cache.move_to_end(key)
+                self.logger.info(f"命中识别缓存: {medicine_name}")
+                return list(bbox)
+
+        bbox = self.llm_api.detect_medicine_box_direct(image_input, medicine_name)
+        # 只缓存有效结果，识别失败时下次仍重新请求
+        if bbox[0] > 0 and bbox[1] > 0 and bbox[2] > 0 and bbox[3] > 0:
+            with self._detect_cache_lock:
+                self._detect_cache[key] = list(bbox)
+                if len(self._detect_cache) > self._detect_cache_size:
+                    self._detect_cache.popitem(last=False)
+        return bbox
+
     # 单个药品抓取
-    def single_medicine_grasp(self, medicine_name, arm_side = "right" , use_sam = False):
+    def single_medicine_grasp(self, medicine_name, arm_side = "right" , use_sam = False, upcoming = None):
+        """
+        抓取单个药品
+
+        Args:
+            medicine_name: 要抓取的药品名称
+            arm_side: 使用的机械臂，"left" 或 "right"
+            use_sam: 是否使用SAM分割计算抓取点
+            upcoming: 同一机械臂接下来要抓取的药品列表，提供时与当前药品合并为一次批量识别
+        """
         
         flag = False
         self.logger.info(f"single_medicine_grasp：开始抓取药品: {medicine_name}")
@@ -149,18 +236,40 @@ class GraspTask:
         robot_config = self.config.robots["left"] if arm_side == "left" else self.config.robots["right"]
 
         robot.set_arm_init_joint()
-        time.sleep(2)
+        # 等待机械臂停稳并拿到停稳之后采集的新帧，而不是固定等待2秒
+        robot.wait_motion_done(timeout=2.0)
+        camera.wait_for_frame(timeout=2.0)
         # 获取图像
         bgr_frame,depth_frame= get_images(camera, self.logger) 
 
         #保存图片
-        img_path = get_timestamped_path(f"{arm_side}_rgb.jpg")
-        cv2.imwrite(img_path, bgr_frame)
-        self.logger.info(f"{arm_side} rgb图片保存成功: {img_path}")
+        if self.debug_save:
+            img_path = get_timestamped_path(f"{arm_side}_rgb.jpg")
+            self._io_pool.submit(debug_imwrite, img_path, bgr_frame)
+            self.logger.info(f"{arm_side} rgb图片保存: {img_path}")
 
         # 1. 识别药品
         # 只有两个退出条件，1. 识别成功然后抓取，不以是否抓取成功为条件 2. 识别失败
-        bbox = self.llm_api.detect_medicine_box_direct(ImageInput(image_path=img_path), medicine_name)
+        image_input = ImageInput(image_np=bgr_frame)
+        bbox = None
+        future = self._bbox_futures.pop((arm_side, medicine_name), None)
+        if future is not None:
+            box = future.result()[medicine_name]
+            if box[0] > 0 and box[1] > 0 and box[2] > 0 and box[3] > 0:
+                bbox = box
+                self.logger.info(f"使用批量预识别结果: {medicine_name}")
+
+        # 还没有预识别的后续药品提交一次后台批量识别；同名药品会识别到本次要抓的同一个盒子，因此排除
+        others = [m for m in dict.fromkeys(upcoming or [])
+                  if m != medicine_name and (arm_side, m) not in self._bbox_futures]
+        if others:
+            batch = self._vlm_pool.submit(self.llm_api.detect_medicine_boxes, image_input, others)
+            for name in others:
+                self._bbox_futures[(arm_side, name)] = batch
+
+        # 预识别结果缺失或无效时，在当前画面上重新识别
+        if bbox is None:
+            bbox = self._detect_cached(image_input, medicine_name)
         self.logger.info(f"识别到的药品边界框: {bbox}")
         if bbox[0] <= 0 or bbox[1] <= 0 or bbox[2] <= 0 or bbox[3] <= 0:
             self.logger.error(f"未能有效识别药品 '{medicine_name}'")
@@ -180,7 +289,7 @@ class GraspTask:
             x = (x1 + x2) // 2
             # y = y1 + (y2 - y1) // 4  # 上1/4处
             y = (y1 + y2) // 2
-            depth_value = depth_frame[y, x]
+            depth_value = window_depth(depth_frame, x, y)
             self.logger.info(f"首次获取到的深度值: {depth_value}，抓取点坐标: ({x}, {y})")
         except:
             self.logger.error(f"未能获取到有效深度值")
@@ -191,18 +300,18 @@ class GraspTask:
             self.logger.info(f"复位姿态成功")
             return False
         
-        # 确保获取到有效的深度值，最多尝试200次
-        attempt_count = 0
-        max_attempts = 200
-        while depth_value <= 0 and attempt_count < max_attempts:
+        # 7x7邻域全部无效时先扩大到31x31邻域（至少11个有效像素），仍无效才重新采集一帧
+        if depth_value <= 0:
+            depth_value = window_depth(depth_frame, x, y, radius=15, min_valid=11)
+        if depth_value <= 0:
+            self.logger.warning(f"抓取点邻域内没有有效深度，重新采集一帧")
+            camera.wait_for_frame(timeout=1.0)
             bgr_frame, depth_frame = get_images(camera, self.logger)
-            depth_value = depth_frame[y, x]
-            attempt_count += 1
-            time.sleep(0.3)
-            
-            
+            if depth_frame is not None:
+                depth_value = window_depth(depth_frame, x, y, radius=15, min_valid=11)
+
         if depth_value <= 0:
-            self.logger.error(f"无法获取药品 '{medicine_name}' 的有效深度信息，已尝试 {max_attempts} 次")
+            self.logger.error(f"无法获取药品 '{medicine_name}' 的有效深度信息")
             if arm_side == "right":
                 robot.set_arm_joints_block(self.right_moving_joints)
             else:
@@ -213,20 +322,22 @@ class GraspTask:
         self.logger.info(f"最终获取到的深度值: {depth_value}")
         
         # 保存标记了识别位置的图片
-        marked_image_path = get_timestamped_path(f"{arm_side}_detected_medicine.jpg")
-        mark_detected_medicine_on_image(bgr_frame, bbox, depth_value, medicine_name, marked_image_path)
-        self.logger.info(f"药品识别边界框标记图片保存成功: {marked_image_path}")
+        if self.debug_save:
+            marked_image_path = get_timestamped_path(f"{arm_side}_detected_medicine.jpg")
+            self._io_pool.submit(mark_detected_medicine_on_image, bgr_frame, bbox, depth_value, medicine_name, marked_image_path)
+            self.logger.info(f"药品识别边界框标记图片保存: {marked_image_path}")
 
         mask = None
         # 2. Sam分割
         if use_sam:
-            rgb_image = cv2.cvtColor(bgr_frame, cv2.COLOR_BGR2RGB)
-            center, mask = self.sam_model.predict(rgb_image, bboxes=bbox)
+            with self._sam_lock:
+                center, mask = self.sam_model.predict(bgr_frame, bboxes=bbox)
             self.logger.info(f"Sam分割成功")
-            #保存图片
-            img_path = get_timestamped_path(f"{arm_side}_sam_mask.jpg")
-            cv2.imwrite(img_path, mask)
-            self.logger.info(f"Sam分割结果保存成功: {img_path}")
+            #保存图片，掩码为二值图，使用低压缩等级的PNG以减少编码耗时
+            if self.debug_save:
+                img_path = get_timestamped_path(f"{arm_side}_sam_mask.png")
+                self._io_pool.submit(debug_imwrite, img_path, mask)
+                self.logger.info(f"Sam分割结果保存: {img_path}")
         else:
             self.logger.info(f"未使用Sam分割")
 
@@ -235,13 +346,13 @@ class GraspTask:
         computed_object_pose, prepared_angle_pose, finally_pose = vertical_catch(
             mask=mask,
             depth_frame=depth_frame,
-            color_intr=camera_config.color_intr,
+            intrinsics=camera_config.intrinsics,
             current_pose=pose,
             adjustment=robot_config.adjustment,
-            rotation_matrix=camera_config.rotation_matrix,
-            translation_vector=camera_config.translation_vector,
+            T_camera_to_end_effector=camera_config.T_cam_ee,
             x = x,
             y = y,
+            depth = depth_value,
         )      
 
         if arm_side == "right":
@@ -266,50 +377,100 @@ class GraspTask:
             else:
                 robot.set_arm_joints_block([-5.409,58.655,110.853,84.692,90.981,190.435]) 
 
-            time.sleep(1)      
+            robot.wait_motion_done(timeout=3.0)
             self.logger.info(f"开始移动到prepared_angle_pose{prepared_angle_pose}")
-            robot.set_pose_block(prepared_angle_pose, linear=True)
-            time.sleep(1.5)
+            robot.movel_block(prepared_angle_pose)
+            robot.wait_motion_done(timeout=3.0)
             self.logger.info(f"开始移动到finally_pose{finally_pose}")    
-            robot.set_pose_block(finally_pose, linear=True)
-            time.sleep(1.5)
+            robot.movel_block(finally_pose)
+            # 吸盘贴合后停留一段时间建立负压，运动完成不代表已吸牢
+            time.sleep(SUCTION_SEAL_TIME)
             finally_pose[2] = finally_pose[2] +0.02
             self.logger.info(f"开始移动到finally_pose往上抬2cm的位置{finally_pose}")    
-            robot.set_pose_block(finally_pose, linear=True)
-            time.sleep(1.5)
+            robot.movel_block(finally_pose)
+            robot.wait_motion_done(timeout=3.0)
             prepared_angle_pose[2] = prepared_angle_pose[2] +0.02
             if arm_side == "right":
                 prepared_angle_pose[1] = prepared_angle_pose[1] +0.04
             else:
                 prepared_angle_pose[1] = prepared_angle_pose[1] -0.04
             self.logger.info(f"开始移动到prepared_angle_pose往上抬2cm,往后抬3cm的位置{prepared_angle_pose}")
-            robot.set_pose_block(prepared_angle_pose, linear=True)
-            time.sleep(1.5)
+            robot.movel_block(prepared_angle_pose)
+            robot.wait_motion_done(timeout=3.0)
             self.logger.info(f"药品抓取成功: {medicine_name}")  
             flag = True
         except:
             self.logger.error(f"药品抓取失败: {medicine_name}")
         finally : 
+            # 机械臂已进入货架，无论成败都可能碰动其他药盒，之前画面的识别结果不再可信
+            with self._detect_cache_lock:
+                self._detect_cache.clear()
+            for key in [key for key in list(self._bbox_futures) if key[0] == arm_side]:
+                self._bbox_futures.pop(key, None)
             self.logger.info(f"开始移动到安全位置1")
             if arm_side == "left":               
                 robot.set_arm_joints_block([-8.639,68.803,119.634,-98.558,91.264,-171.646 + 60]) 
             else:
                 robot.set_arm_joints_block([-5.409,58.655,110.853,84.692,90.981,190.435 - 60]) 
 
-            time.sleep(1)   
-            self.logger.info(f"开始移动到放取位姿")
-            robot.set_arm_fang_joint()
-            time.sleep(1.5)
-            self.logger.info(f"开始释放 suction")
-            robot.release_suck()
-            time.sleep(2)
-            if arm_side == "right":
-                robot.set_arm_joints_block(self.right_moving_joints)
-            else:
-                robot.set_arm_joints_block(self.left_moving_joints)
+            robot.wait_motion_done(timeout=3.0)
+            # 两臂共用放药区域，同一时间只允许一只机械臂进入
+            with self._place_lock:
+                self.logger.info(f"开始移动到放取位姿")
+                robot.set_arm_fang_joint()
+                robot.wait_motion_done(timeout=3.0)
+                self.logger.info(f"开始释放 suction")
+                robot.release_suck()
+                time.sleep(2)
+                if arm_side == "right":
+                    robot.set_arm_joints_block(self.right_moving_joints)
+                else:
+                    robot.set_arm_joints_block(self.left_moving_joints)
             self.logger.info(f"复位姿态成功")
             return flag
     
+    def _arm_grasp_loop(self, items: List[dict], arm_side: str, cond: threading.Condition) -> None:
+        """
+        单臂抓取循环，与另一只机械臂共享同一份待抓列表
+
+        每个药品同一时间只被一只机械臂认领；抓取失败后记录该臂已尝试，
+        释放给另一只机械臂继续尝试。本臂没有可认领的药品、但另一只臂手上
+        还有本臂未尝试过的药品时，等待其结果。
+
+        Args:
+            items: 待抓药品列表，元素为 {"name", "done", "claimed_by", "tried"}
+            arm_side: 使用的机械臂，"left" 或 "right"
+            cond: 保护 items 的条件变量
+        """
+        while True:
+            with cond:
+                while True:
+                    candidates = [item for item in items
+                                  if not item["done"] and arm_side not in item["tried"]]
+                    free = [item for item in candidates if item["claimed_by"] is None]
+                    if free:
+                        item = free[0]
+                        item["claimed_by"] = arm_side
+                        upcoming = [other["name"] for other in free[1:]]
+                        break
+                    if not candidates:
+                        return
+                    cond.wait()
+
+            medicine = item["name"]
+            success = False
+            try:
+                success = self.single_medicine_grasp(medicine, arm_side=arm_side, upcoming=upcoming)
+            finally:
+                with cond:
+                    item["claimed_by"] = None
+                    item["tried"].add(arm_side)
+                    item["done"] = success
+                    cond.notify_all()
+            if not success:
+                arm_name = "右臂" if arm_side == "right" else "左臂"
+                self.logger.warning(f"{arm_name}：药品 '{medicine}' 抓取失败")
+
     # 抓取一层药品
     def layer_grasp(self):
         self.logger.info(f"layer_grasp：开始抓取一层药品，当前药品列表: {self.medicine_list}")
@@ -318,34 +479,32 @@ class GraspTask:
             self.logger.info("layer_grasp：没有药品可以抓取,直接返回")
             return 
         
-        medicines = self.medicine_list.copy()        
-        # 遍历尝试抓取每个药品
-        for i, medicine in enumerate(medicines):
-            if self.single_medicine_grasp(medicine, arm_side="right"):
-                # 抓取成功，标记为None
-                medicines[i] = None
-            else:
-                self.logger.warning(f"右臂：药品 '{medicine}' 抓取失败")        
-        # 更新medicine_list，只保留未抓取成功的药品
-        self.medicine_list = [m for m in medicines if m is not None]
-        self.logger.info(f"右臂抓取完毕，开始左臂抓取，当前药品列表: {self.medicine_list}")
-
-
+        # 左右臂各一个线程并行抓取，两臂共享待抓列表，一只臂抓不到的药品交给另一只臂再试
+        items = [{"name": m, "done": False, "claimed_by": None, "tried": set()} for m in self.medicine_list]
+        cond = threading.Condition()
+        errors = []
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="arm") as pool:
+            futures = [pool.submit(self._arm_grasp_loop, items, arm_side, cond)
+                       for arm_side in ("right", "left")]
+            # 先等两只臂都结束，再处理异常，避免另一只臂还在运动时就退出
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"layer_grasp：机械臂抓取线程异常: {str(e)}")
+                    errors.append(e)
 
-        if self.medicine_list is None or len(self.medicine_list) == 0:
-            self.logger.info("layer_grasp：没有药品可以抓取,直接返回")
-            return 
-        
-        medicines = self.medicine_list.copy()
-        for i, medicine in enumerate(self.medicine_list):
-            if self.single_medicine_grasp(medicine, arm_side="left"):
-                # 抓取成功，标记为None
-                medicines[i] = None
-            else:
-                self.logger.warning(f"左臂：药品 '{medicine}' 抓取失败")        
         # 更新medicine_list，只保留未抓取成功的药品
-        self.medicine_list = [m for m in medicines if m is not None]
-        self.logger.info(f"左臂抓取完毕，剩余药品: {self.medicine_list}")
+        self.medicine_list = [item["name"] for item in items if not item["done"]]
+        self.logger.info(f"左右臂抓取完毕，剩余药品: {self.medicine_list}")
+        # 换层后画面改变，丢弃本层未使用的批量识别结果和识别缓存
+        self._bbox_futures.clear()
+        with self._detect_cache_lock:
+            self._detect_cache.clear()
+
+        # 机械臂硬件异常时出故障的臂可能仍伸在货架内，继续抛出以中止后续的升降机动作
+        if errors:
+            raise errors[0]
 
         return 
     
@@ -357,20 +516,28 @@ class GraspTask:
             return 
         
         self.lift.cmd_vel_callback(440)
-        self.logger.info("移动升降机到300,开始sleep 15 秒")
-        time.sleep(7)
+        self.logger.info("移动升降机到440,等待到位（最多7秒）")
+        self.lift.wait_position(440, timeout=7)
         self.layer_grasp()
 
         self.lift.cmd_vel_callback(140)
-        self.logger.info("移动升降机到0,开始sleep 15 秒")
-        time.sleep(12)
+        self.logger.info("移动升降机到140,等待到位（最多12秒）")
+        self.lift.wait_position(140, timeout=12)
         self.layer_grasp()
 
         self.lift.cmd_vel_callback(380)
-        self.logger.info("移动升降机到380,开始sleep 15 秒")
-        time.sleep(16)
+        self.logger.info("移动升降机到380,等待到位（最多16秒）")
+        self.lift.wait_position(380, timeout=16)
 
     
+    def _wait_both_arms_done(self, timeout: float) -> None:
+        """等待左右臂非阻塞下发的运动都执行完毕，总时长不超过timeout"""
+        start = time.monotonic()
+        self.left_robot.wait_motion_done(timeout=timeout, start_timeout=0.5)
+        elapsed = time.monotonic() - start
+        self.right_robot.wait_motion_done(timeout=max(0.0, timeout - elapsed),
+                                          start_timeout=max(0.0, 0.5 - elapsed))
+
     # 放置药品篮子
     def place_medicine_basket(self):
 
@@ -385,8 +552,8 @@ class GraspTask:
         self.right_robot.suck()
         self.left_robot.robot.rm_movej(joint = l ,v = 15 ,r = 0,connect=0,block= 0)
         self.right_robot.robot.rm_movej(joint = r ,v = 15,r = 0,connect=0,block= 0)
-        self.logger.info("移动到预备位置")     
-        time.sleep(6)
+        self.logger.info("移动到预备位置")
+        self._wait_both_arms_done(timeout=6)
 
 
         r = [18.198/1000, -230.454/1000,173.369/1000,-3.080,-0.154,1.404]
@@ -396,7 +563,9 @@ class GraspTask:
         self.left_robot.robot.rm_movel(pose = l ,v = 15,r = 0,connect=0,block= 0)
         self.right_robot.robot.rm_movel(pose = r ,v = 15,r = 0,connect=0,block= 0)
         self.logger.info("下降1.5cm")
-        time.sleep(4)
+        self._wait_both_arms_done(timeout=4)
+        # 吸盘贴合篮子后停留一段时间建立负压，运动完成不代表已吸牢
+        time.sleep(SUCTION_SEAL_TIME)
 
         
         r[2] = r[2] + 0.07
@@ -404,21 +573,21 @@ class GraspTask:
         self.left_robot.robot.rm_movel(pose = l ,v = 15,r = 0,connect=0,block= 0)
         self.right_robot.robot.rm_movel(pose = r ,v = 15,r = 0,connect=0,block= 0)
         self.logger.info("上升7cm")
-        time.sleep(5)
+        self._wait_both_arms_done(timeout=5)
 
         l[1] = l[1] + 0.16
         r[1] = r[1] - 0.16
         self.left_robot.robot.rm_movel(pose = l ,v = 15,r = 0,connect=0,block= 0)
         self.right_robot.robot.rm_movel(pose = r ,v = 15,r = 0,connect=0,block= 0)
         self.logger.info("向前16cm")
-        time.sleep(7)
+        self._wait_both_arms_done(timeout=7)
 
         l = [93.593,-61.494,-38.603,4.78,-62.226,-180.494]
         r = [-85.113,-55.873,-44.255,2.923,-62.484,192.713]
         self.left_robot.robot.rm_movej(joint = l ,v = 15,r = 0,connect=0,block= 0)
         self.right_robot.robot.rm_movej(joint = r ,v = 15,r = 0,connect=0,block= 0)
         self.logger.info("移动到目标位姿")
-        time.sleep(5)
+        self._wait_both_arms_done(timeout=5)
 
         self.left_robot.release_suck()
         self.right_robot.release_suck()
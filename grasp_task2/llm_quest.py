@@ -4,11 +4,35 @@ import base64
 import re
 import json
 from typing import List, Dict, Union, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import cv2
 import numpy as np
 
+from utils.logger import get_logger
+
+logger = get_logger("VisionAPI")
+
+# 解析模型返回结果用的正则，模块加载时编译一次
+_BBOX_JSON_RE = re.compile(r'\{[^}]*"x1"[^}]*"y1"[^}]*"x2"[^}]*"y2"[^}]*\}')
+_BBOX_ARRAY_RE = re.compile(r'\[\s*\d+\s*,\s*\d+\s*,\s*\d+\s*,\s*\d+\s*\]')
+_NUM_RE = re.compile(r'\d+')
+_BRACKET_RE = re.compile(r'\[(.*?)\]')
+_BBOX_DICT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# image_np 上传时支持的编码格式: 格式名 -> (扩展名, MIME类型, 质量参数)
+_IMAGE_FORMATS = {
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+def _loads_or_none(text: str):
+    """解析JSON文本，不是合法JSON时返回None"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
 @dataclass
 class ImageInput:
     """图像输入数据类
@@ -16,14 +40,20 @@ class ImageInput:
     Args:
         image_path: JPG图片文件路径，必须是.jpg或.jpeg格式
         image_np: OpenCV捕获的图像数据，必须为BGR格式，将被编码为JPG格式
+
+    同一个 ImageInput 多次调用接口时只编码一次，编码结果缓存在 _cached_b64 中，
+    因此创建后不应再原地修改 image_np 或替换 image_path 指向的文件
     """
     image_path: Optional[str] = None
     image_np: Optional[np.ndarray] = None
+    _cached_b64: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _cached_mime: str = field(default="image/jpeg", init=False, repr=False, compare=False)
 
 class VisionAPI:
     """视觉API封装类"""
     
-    def __init__(self, api_key: Optional[str] = None, base_url: str = "https://dashscope.aliyuncs.com/compatible-mode/v1"):
+    def __init__(self, api_key: Optional[str] = None, base_url: str = "https://dashscope.aliyuncs.com/compatible-mode/v1",
+                 image_format: str = "jpeg", image_quality: int = 85):
         """
         初始化视觉API类
         
@@ -32,18 +62,25 @@ class VisionAPI:
             base_url: API基础URL
             base_url: str = "http://localhost:11434/v1"
             base_url: str = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+            image_format: image_np 的上传编码格式，"jpeg" 或 "webp"；
+                WebP 编码更快，但只有确认服务端支持时才应使用（如本地Ollama）
+            image_quality: 编码质量(0-100)，JPEG质量85足够识别，且比默认95明显减小请求体积
         """
         self.api_key = api_key or os.getenv('DASHSCOPE_API_KEY')
         if not self.api_key:
             raise ValueError("未设置API密钥")
+        if image_format not in _IMAGE_FORMATS:
+            raise ValueError(f"不支持的图片格式: {image_format}")
         
         self.base_url = base_url
+        self._image_ext, self._image_mime, quality_flag = _IMAGE_FORMATS[image_format]
+        self._image_params = [quality_flag, image_quality]
         self.client = OpenAI(
             api_key=self.api_key,
             base_url=self.base_url,
         )
 
-    def _encode_image(self, image_input: ImageInput) -> str:
+    def _encode_image(self, image_input: ImageInput) -> Tuple[str, str]:
         """
         将图片编码为base64格式
         
@@ -51,18 +88,28 @@ class VisionAPI:
             image_input: 图像输入数据
             
         Returns:
-            str: base64编码的图片数据
+            Tuple[str, str]: (MIME类型, base64编码的图片数据)
         """
+        if image_input._cached_b64 is not None:
+            return image_input._cached_mime, image_input._cached_b64
+
         if image_input.image_np is not None:
             # image_np 必须为BGR格式，否则颜色会异常
-            _, buffer = cv2.imencode('.jpg', image_input.image_np)
-            return base64.b64encode(buffer).decode("utf-8")
+            _, buffer = cv2.imencode(self._image_ext, image_input.image_np, self._image_params)
+            encoded = base64.b64encode(buffer).decode("utf-8")
+            mime = self._image_mime
         elif image_input.image_path is not None:
+            # 磁盘上已经是JPEG，直接读取字节，不再解码重编码
             with open(image_input.image_path, "rb") as image_file:
-                return base64.b64encode(image_file.read()).decode("utf-8")
+                encoded = base64.b64encode(image_file.read()).decode("utf-8")
+            mime = "image/jpeg"
         else:
             raise ValueError("必须提供 image_path 或 image_np")
 
+        image_input._cached_mime = mime
+        image_input._cached_b64 = encoded
+        return mime, encoded
+
 
     def _validate_image_input(self, image_input: ImageInput) -> None:
         """
@@ -104,7 +151,7 @@ class VisionAPI:
             str: API响应文本
         """
         try:
-            base64_image = self._encode_image(image_input)
+            mime, base64_image = self._encode_image(image_input)
             
             completion = self.client.chat.completions.create(
                 model= model,
@@ -118,7 +165,7 @@ class VisionAPI:
                         "content": [
                             {
                                 "type": "image_url",
-                                "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}
+                                "image_url": {"url": f"data:{mime};base64,{base64_image}"}
                             },
                             {"type": "text", "text": user_prompt}
                         ]
@@ -179,8 +226,13 @@ class VisionAPI:
             
             # 尝试提取JSON格式的坐标
             try:
+                # 模型通常直接返回干净的JSON，先整体解析一次，失败再用正则查找
+                coords = _loads_or_none(response_text)
+                if isinstance(coords, dict) and all(k in coords for k in ('x1', 'y1', 'x2', 'y2')):
+                    return [int(coords['x1']), int(coords['y1']), int(coords['x2']), int(coords['y2'])]
+
                 # 查找JSON格式的坐标
-                json_match = re.search(r'\{[^}]*"x1"[^}]*"y1"[^}]*"x2"[^}]*"y2"[^}]*\}', response_text)
+                json_match = _BBOX_JSON_RE.search(response_text)
                 if json_match:
                     json_str = json_match.group()
                     coords = json.loads(json_str)
@@ -191,7 +243,7 @@ class VisionAPI:
                     return [x1, y1, x2, y2]
                 
                 # 如果没有找到JSON格式，尝试提取数字坐标
-                numbers = re.findall(r'\d+', response_text)
+                numbers = _NUM_RE.findall(response_text)
                 if len(numbers) >= 4:
                     x1 = int(numbers[0])
                     y1 = int(numbers[1])
@@ -261,8 +313,13 @@ class VisionAPI:
             
             # 尝试提取坐标数组
             try:
+                # 模型通常直接返回干净的坐标数组，先整体解析一次，失败再用正则查找
+                coords = _loads_or_none(response_text)
+                if isinstance(coords, list) and len(coords) == 4:
+                    return [int(coords[0]), int(coords[1]), int(coords[2]), int(coords[3])]
+
                 # 查找方括号格式的坐标
-                array_match = re.search(r'\[\s*\d+\s*,\s*\d+\s*,\s*\d+\s*,\s*\d+\s*\]', response_text)
+                array_match = _BBOX_ARRAY_RE.search(response_text)
                 if array_match:
                     # 提取数字
                     coords_str = array_match.group()
@@ -271,7 +328,7 @@ class VisionAPI:
                     return [int(coords[0]), int(coords[1]), int(coords[2]), int(coords[3])]
                 
                 # 如果没有找到方括号格式，尝试提取数字
-                numbers = re.findall(r'\d+', response_text)
+                numbers = _NUM_RE.findall(response_text)
                 if len(numbers) >= 4:
                     x1 = int(numbers[0])
                     y1 = int(numbers[1])
@@ -296,6 +353,76 @@ class VisionAPI:
             return [0, 0, 0, 0]
 
 
+    def detect_medicine_boxes(self, image_input: ImageInput, medicine_names: List[str]) -> Dict[str, List[int]]:
+        """
+        一次请求检测图片中多个药品盒的位置
+
+        同一张图片只编码、上传并预填充一次，比逐个药品调用 detect_medicine_box_direct 少多次往返
+
+        Args:
+            image_input: 图像输入数据
+            medicine_names: 要检测的药品名称列表
+
+        Returns:
+            Dict[str, List[int]]: 药品名称到 [x1, y1, x2, y2] 的映射，未检测到的药品为[0, 0, 0, 0]
+        """
+        names = list(dict.fromkeys(medicine_names))
+        result = {name: [0, 0, 0, 0] for name in names}
+        if not names:
+            return result
+
+        try:
+            self._validate_image_input(image_input)
+
+            system_prompt = """你是一个专业的药品检测助手。你的任务是：
+1. 仔细分析图片中的药品盒
+2. 逐个识别用户给出的每一个药品名称
+3. 对每个找到的药品盒，计算其边界框坐标（左上角和右下角）
+4. 严格按照指定格式返回结果
+
+重要规则：
+- 坐标系统：图片左上角为原点(0,0)，向右为x轴正方向，向下为y轴正方向
+- 返回格式：必须是一个JSON对象，键为药品名称（与用户给出的名称完全一致），值为[x1, y1, x2, y2]，例如：{"药品A": [200, 150, 500, 350], "药品B": [0, 0, 0, 0]}
+- 未找到的药品，值为：[0, 0, 0, 0]
+- 不要添加任何解释文字，只返回JSON对象"""
+
+            names_text = json.dumps(names, ensure_ascii=False)
+            user_prompt = f"""请在图片中精确找到以下每一个药品：{names_text}
+
+返回JSON对象，键为上述药品名称，值为边界框坐标数组：
+[左上角x坐标, 左上角y坐标, 右下角x坐标, 右下角y坐标]
+
+注意：
+- 只匹配与药品名称完全匹配或高度相似的药品盒
+- 每个药品名称都必须出现在返回结果中，没有找到的值为[0, 0, 0, 0]
+- 只返回JSON对象，不要添加其他文字
+- 确保坐标准确表示药品盒的边界"""
+
+            response_text = self._call_vision_api(image_input, system_prompt, user_prompt,
+                                                  max_tokens=60 + 40 * len(names))
+            logger.debug(f"批量检测返回: {response_text}")
+
+            try:
+                dict_match = _BBOX_DICT_RE.search(response_text)
+                if not dict_match:
+                    logger.warning(f"批量检测返回中没有JSON对象，原始返回: {response_text}")
+                    return result
+                boxes = json.loads(dict_match.group())
+                for name in names:
+                    coords = boxes.get(name)
+                    if isinstance(coords, list) and len(coords) == 4:
+                        result[name] = [int(c) for c in coords]
+                return result
+
+            except (json.JSONDecodeError, ValueError, TypeError, AttributeError) as e:
+                logger.warning(f"无法解析批量检测结果 - {e}，原始返回: {response_text}")
+                return result
+
+        except Exception as e:
+            logger.error(f"批量检测药品失败: {e}")
+            return result
+
+
     def extract_prescription_medicines(self, image_input: ImageInput) -> List[str]:
         """
         从处方单图片中提取药品列表
@@ -340,8 +467,12 @@ R: 1. 健胃消食片 0.8g*32片 1盒
                 return json.loads(response_text)
             except json.JSONDecodeError:
                 # 如果直接解析失败，尝试提取方括号中的内容
-                matches = re.search(r'\[(.*?)\]', response_text)
+                matches = _BRACKET_RE.search(response_text)
                 if matches:
+                    # 优先按JSON数组解析，药品名中带逗号时也不会被拆开
+                    medicines = _loads_or_none(matches.group(0))
+                    if isinstance(medicines, list):
+                        return [str(med) for med in medicines]
                     # 分割字符串并清理每个药品名称
                     medicines = [med.strip(' "\'') for med in matches.group(1).split(',')]
                     return medicines
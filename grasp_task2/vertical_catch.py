@@ -3,64 +3,101 @@ import numpy as np
 from numpy import ndarray
 from typing import Tuple
 import copy
+import math
+import threading
 import numpy as np
-from scipy.spatial.transform import Rotation as R
 
 
-def convert(x, y, z, x1, y1, z1, rx, ry, rz, rotation_matrix, translation_vector):
+def _euler_xyz_to_matrix(rx, ry, rz) -> ndarray:
+    """
+    外旋xyz欧拉角（弧度）转旋转矩阵，等价于 Rotation.from_euler("xyz", ...).as_matrix()
+
+    直接按 Rz @ Ry @ Rx 的展开式计算，避免每次调用scipy Rotation的校验和分派开销
+    """
+    # 标量三角函数用math，比np.cos/np.sin少一次ufunc分派
+    cx, sx = math.cos(rx), math.sin(rx)
+    cy, sy = math.cos(ry), math.sin(ry)
+    cz, sz = math.cos(rz), math.sin(rz)
+    return np.array([
+        [cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz],
+        [cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz],
+        [-sy, sx * cy, cx * cy],
+    ])
+
+
+def convert(x, y, z, x1, y1, z1, rx, ry, rz, rotation_matrix=None, translation_vector=None,
+            T_camera_to_end_effector=None):
     """
     接收单位 m
 
     我们需要将旋转向量和平移向量转换为齐次变换矩阵，然后使用深度相机识别到的物体坐标（x, y, z）和
     机械臂末端的位姿（x1,y1,z1,rx,ry,rz）来计算物体相对于机械臂基座的位姿（x, y, z, rx, ry, rz）
 
+    手眼标定结果可以直接传入预先构造好的4x4齐次矩阵 T_camera_to_end_effector，
+    此时忽略 rotation_matrix 和 translation_vector
+
     """
+    if T_camera_to_end_effector is not None:
+        rotation_matrix = T_camera_to_end_effector[:3, :3]
+        translation_vector = T_camera_to_end_effector[:3, 3]
+    else:
+        rotation_matrix = np.asarray(rotation_matrix, dtype=np.float64)
+        translation_vector = np.asarray(translation_vector, dtype=np.float64)
 
-    rotation_matrix = rotation_matrix
-    translation_vector = translation_vector
     # 深度相机识别物体返回的坐标
-    obj_camera_coordinates = np.array([x, y, z])
+    obj_camera_coordinates = np.array([x, y, z], dtype=np.float64)
+
+    # 物体在机械臂末端坐标系下的坐标：相机到末端的刚体变换
+    obj_end_effector_coordinates = rotation_matrix @ obj_camera_coordinates + translation_vector
 
-    # 机械臂末端的位姿，单位为弧度
-    end_effector_pose = np.array([x1, y1, z1, rx, ry, rz])
+    # 机械臂末端的位姿，单位为弧度；再变换到基座坐标系
+    orientation = _euler_xyz_to_matrix(rx, ry, rz)
+    obj_base_coordinates = orientation @ obj_end_effector_coordinates + np.array([x1, y1, z1], dtype=np.float64)
 
-    # 将旋转矩阵和平移向量转换为齐次变换矩阵
-    T_camera_to_end_effector = np.eye(4)
-    T_camera_to_end_effector[:3, :3] = rotation_matrix
-    T_camera_to_end_effector[:3, 3] = translation_vector
+    # 组合结果，旋转保持原始的rx, ry, rz
+    obj_base_pose = np.hstack((obj_base_coordinates, [rx, ry, rz]))
 
-    # 机械臂末端的位姿转换为齐次变换矩阵
-    position = end_effector_pose[:3]
-    orientation = R.from_euler("xyz", end_effector_pose[3:], degrees=False).as_matrix()
+    return obj_base_pose
 
-    T_base_to_end_effector = np.eye(4)
-    T_base_to_end_effector[:3, :3] = orientation
-    T_base_to_end_effector[:3, 3] = position
 
-    # 计算物体相对于机械臂基座的位姿
-    obj_camera_coordinates_homo = np.append(
-        obj_camera_coordinates, [1]
-    )  # 将物体坐标转换为齐次坐标
-    # obj_end_effector_coordinates_homo = np.linalg.inv(T_camera_to_end_effector).dot(obj_camera_coordinates_homo)
 
-    obj_end_effector_coordinates_homo = T_camera_to_end_effector.dot(
-        obj_camera_coordinates_homo
-    )
+# 掩码筛选用的布尔缓冲区，相机分辨率固定，跨调用复用；左右臂可能并行调用，每个线程各自一份
+_scratch = threading.local()
 
-    obj_base_coordinates_homo = T_base_to_end_effector.dot(
-        obj_end_effector_coordinates_homo
-    )
 
-    obj_base_coordinates = obj_base_coordinates_homo[
-        :3
-    ]  # 从齐次坐标中提取物体的x, y, z坐标
+def _masked_nonzero_pixels(mask: ndarray, depth_frame: ndarray) -> Tuple[ndarray, ndarray, ndarray]:
+    """
+    取出mask非零且深度非零的像素坐标及深度值，深度保持深度图原始dtype(uint16)
 
-    # 组合结果，旋转保持原始的rx, ry, rz
-    obj_base_pose = np.hstack((obj_base_coordinates, [rx, ry, rz]))
+    mask为0/255的二值图，直接对原始uint8和uint16做一次logical_and（非零即真），
+    不再单独生成 mask==255 和 depth!=0 两个中间掩码，结果写入复用的缓冲区
 
-    return obj_base_pose
+    :return: (xs, ys, depths)
+    """
+    valid = getattr(_scratch, "valid", None)
+    if valid is None or valid.shape != depth_frame.shape:
+        _scratch.valid = valid = np.empty(depth_frame.shape, dtype=bool)
+    np.logical_and(mask, depth_frame, out=valid)
+    ys, xs = np.nonzero(valid)
+    return xs, ys, depth_frame[ys, xs]
 
 
+def _backproject(xs: ndarray, ys: ndarray, depths: ndarray,
+                 fx: float, fy: float, ppx: float, ppy: float) -> Tuple[ndarray, ndarray, ndarray]:
+    """
+    将像素坐标和深度(mm)批量反投影为相机坐标系下的三维点(m)
+    """
+    z = depths.astype(np.float32) * 0.001
+    x = z * (xs - ppx) / fx
+    y = z * (ys - ppy) / fy
+    return x, y, z
+
+
+def _median_select(values: ndarray) -> float:
+    """取中值，只做partition选择不完整排序"""
+    k = values.size // 2
+    return float(np.partition(values, k)[k])
+
 
 def vertical_catch(
         mask: ndarray = None,
@@ -71,18 +108,24 @@ def vertical_catch(
         rotation_matrix: list = None,
         translation_vector: list = None,
         x: int = None,
-        y: int = None
+        y: int = None,
+        depth: float = None,
+        intrinsics: Tuple[float, float, float, float] = None,
+        T_camera_to_end_effector: ndarray = None
 ) -> Tuple[list, list, list]:
     """
     :param mask:    抓取物体的轮廓信息，如果为空则使用传入的x,y坐标
     :param depth_frame:     物体的深度值信息
-    :param color_intr:      相机的内参
+    :param color_intr:      相机的内参，提供intrinsics时可省略
     :param current_pose:    当前的位姿信息
     :param adjustment:      夹爪安全预备位置和最终抓取位置的调整量
     :param rotation_matrix:         手眼标定的旋转矩阵
     :param translation_vector:      手眼标定的平移矩阵
     :param x: 如果mask为空，使用此x坐标
     :param y: 如果mask为空，使用此y坐标
+    :param depth: 如果mask为空且提供该值，直接作为(x,y)处的深度，不再读取depth_frame
+    :param intrinsics: 预先解包的 (fx, fy, ppx, ppy)，提供时优先于color_intr
+    :param T_camera_to_end_effector: 预先构造的手眼标定4x4齐次矩阵，提供时优先于rotation_matrix/translation_vector
 
     :return:
     above_object_pose：      垂直抓取物体上方的位姿
@@ -90,51 +133,54 @@ def vertical_catch(
     finally_pose：           垂直抓取最终下爪的抓取位姿
     """
 
+    if intrinsics is not None:
+        fx, fy, ppx, ppy = intrinsics
+    else:
+        fx, fy, ppx, ppy = color_intr["fx"], color_intr["fy"], color_intr["ppx"], color_intr["ppy"]
+
+    point = None
     if mask is not None and mask.size > 0:
-        _, center = compute_angle_with_mask(mask)
-        real_x, real_y = center[0], center[1]
-        
-        # 使用mask中的最大深度值
-        depth_mask = depth_frame[mask == 255]
-        non_zero_values = depth_mask[depth_mask != 0]
-        if len(non_zero_values) > 0:
-            dis = np.median(non_zero_values)
+        # 将mask内所有有效深度像素反投影为三维点，分别取x/y/z中值作为物体位置，
+        # 比取中心像素再查单个深度更能抵抗深度空洞
+        xs, ys, depths = _masked_nonzero_pixels(mask, depth_frame)
+        if depths.size > 0:
+            px, py, pz = _backproject(xs, ys, depths, fx, fy, ppx, ppy)
+            point = (_median_select(px), _median_select(py), _median_select(pz))
         else:
             # 如果没有有效的深度值，使用中心点的深度
-            dis = depth_frame[real_y][real_x]
+            _, center = compute_angle_with_mask(mask)
+            real_x, real_y = center[0], center[1]
+            dis = depth_frame[int(real_y)][int(real_x)]
     else:
         # 使用传入的x,y坐标
         if x is None or y is None:
             raise ValueError("当mask为空时，必须提供x和y坐标")
         real_x, real_y = x, y
         # 使用指定点的深度信息
-        dis = depth_frame[real_y][real_x]
-
+        dis = depth if depth is not None else depth_frame[real_y][real_x]
 
-    print("dis =  " ,dis)
-    x = int(dis * (real_x - color_intr["ppx"]) / color_intr["fx"])
-    y = int(dis * (real_y - color_intr["ppy"]) / color_intr["fy"])
-    dis = int(dis)
-    x, y, z = (
-        (x) * 0.001,
-        (y) * 0.001,
-        (dis) * 0.001,
-    )  # 夹爪刚好碰到 -180  前面加针 -200
+    if point is not None:
+        x, y, z = point
+    else:
+        print("dis =  " ,dis)
+        x = int(dis * (real_x - ppx) / fx)
+        y = int(dis * (real_y - ppy) / fy)
+        dis = int(dis)
+        x, y, z = (
+            (x) * 0.001,
+            (y) * 0.001,
+            (dis) * 0.001,
+        )  # 夹爪刚好碰到 -180  前面加针 -200
 
     # 计算物体位置，位置是物体中心点正上方10公分
-    obj_pose = convert(x, y, z, *current_pose, rotation_matrix, translation_vector)
-    obj_pose = obj_pose.tolist() if hasattr(obj_pose, 'tolist') else list(obj_pose)
+    obj_pose = convert(x, y, z, *current_pose, rotation_matrix, translation_vector,
+                       T_camera_to_end_effector=T_camera_to_end_effector)
+    computed_object_pose = obj_pose.tolist() if hasattr(obj_pose, 'tolist') else list(obj_pose)
+    obj_x, obj_y, obj_z = computed_object_pose[:3]
 
-    
-
-    computed_object_pose = obj_pose.copy()
-    prepared_angle_pose = obj_pose.copy()
-    finally_pose = obj_pose.copy()
-
-    prepared_angle_pose[1] = obj_pose.copy()[1] - adjustment[0]
-    prepared_angle_pose[3:] = current_pose[3:]
-    finally_pose[1] =  obj_pose.copy()[1] - adjustment[1]
-    finally_pose[3:] = current_pose[3:]
+    # 预备位姿和最终位姿只在y方向按adjustment后退，姿态沿用当前末端姿态
+    prepared_angle_pose = [obj_x, obj_y - adjustment[0], obj_z, *current_pose[3:]]
+    finally_pose = [obj_x, obj_y - adjustment[1], obj_z, *current_pose[3:]]
 
 
     # # 下潜距离
@@ -156,24 +202,24 @@ def vertical_catch(
 
 
 def compute_angle_with_mask(mask):
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    # 初始化最大外接矩形
-    min_rect = None
-    max_area = 0
-
-    for contour in contours:
-        # 计算最小外接矩形
-        center, (w, h), angle = cv2.minAreaRect(contour)
-        area = w * h
-        if area > max_area:
-            max_area = area
-            min_rect = center, (w, h), angle
-
-    # 获取最小外接矩形的信息
-    center, (width, height), angle = min_rect
-
-    if width > height:
-        angle = -(90 - angle)
-    else:
-        angle = angle
-    return angle, center
\ No newline at end of file
+    """
+    计算mask中最大连通区域的中心点和主轴角度
+
+    连通域标记和矩计算都在OpenCV内部完成，不再逐个轮廓在Python中计算最小外接矩形，
+    SAM掩码带有大量细小噪声区域时也只需一次遍历
+
+    :param mask: 二值掩码，前景为非零
+    :return: (angle, center)，angle为主轴相对x轴的角度（度），center为最大连通区域的质心 (x, y)
+    """
+    num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    if num_labels <= 1:
+        raise ValueError("mask中没有前景区域")
+
+    # 第0个标签为背景，取面积最大的前景区域
+    idx = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+    center = (float(centroids[idx][0]), float(centroids[idx][1]))
+
+    # 由二阶中心矩计算主轴方向
+    m = cv2.moments((labels == idx).view(np.uint8), binaryImage=True)
+    angle = 0.5 * math.degrees(math.atan2(2 * m["mu11"], m["mu20"] - m["mu02"]))
+    return angle, center
@@ -1,35 +1,157 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 import threading
-import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import secrets
 import time
 import os
+from pathlib import Path
 from grasp_handler import GraspHandler
+from utils.logger import get_logger
 
 app = Flask(__name__)
+logger = get_logger("server")
+
+
+class RWLock:
+    """读写锁：多个读者可并发，写者独占；有写者等待时新读者让行，避免写者饿死"""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read_lock(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write_lock(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
 
 # 全局变量
-tasks = {}  # 存储任务状态
+tasks = OrderedDict()  # task_id -> TaskRecord，按结束先后排序，超出上限时淘汰最早结束的任务
+tasks_lock = threading.Lock()  # 保护 tasks，请求线程与工作线程都会访问
+MAX_TASKS = 100  # 保留的任务记录上限
+# 任务ID：进程启动时生成一次随机前缀，之后用自增计数，无需每次请求读取系统熵源
+_task_prefix = secrets.token_hex(4)
+_task_counter = itertools.count(1)
 MEDICINES_FILE = "medicines.txt"  # 药品列表文件
+file_lock = RWLock()  # 药品列表文件及其内存缓存的读写锁，查询接口可并发读取
+_medicines_cache = None  # 药品列表内存缓存，只在 write_medicines 时刷新，None 表示尚未加载
 grasp_handler = GraspHandler()  # 抓取处理器实例
 task_lock = threading.Lock()  # 任务锁，确保同一时间只有一个任务在执行
 is_task_running = False  # 任务运行状态标志
+# 常驻任务线程池：同一时间只允许一个任务运行，一个工作线程即可，避免每个请求新建线程
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="task")
+atexit.register(executor.shutdown)
 
 # 任务状态
 TASK_INCOMPLETE = "incomplete"
 TASK_COMPLETE = "complete"
+TASK_FAILED = "failed"
 
-def read_medicines():
-    """读取药品列表"""
+# 长轮询单次最长等待时间（秒）
+MAX_STATUS_WAIT = 30.0
+
+
+@dataclass(slots=True)
+class TaskRecord:
+    """任务记录"""
+    action: str
+    status: str = TASK_INCOMPLETE
+    created_at: float = field(default_factory=time.time)
+    done: threading.Event = field(default_factory=threading.Event)  # 任务结束事件，供 /task_status 长轮询等待
+
+
+def create_task(action):
+    """登记一个新任务，返回 task_id"""
+    with tasks_lock:
+        task_id = f"{_task_prefix}-{next(_task_counter)}"
+        tasks[task_id] = TaskRecord(action)
+    return task_id
+
+def complete_task(task_id, status=TASK_COMPLETE):
+    """标记任务结束（完成或失败），并在任务记录超出上限时淘汰最早结束的任务"""
+    with tasks_lock:
+        tasks[task_id].status = status
+        tasks.move_to_end(task_id)
+        if len(tasks) > MAX_TASKS:
+            finished = [tid for tid, record in tasks.items() if record.status != TASK_INCOMPLETE]
+            for oldest in finished[:len(tasks) - MAX_TASKS]:
+                del tasks[oldest]
+
+def finish_task(task_id):
+    """任务线程退出时唤醒等待该任务的 /task_status 请求"""
+    with tasks_lock:
+        record = tasks.get(task_id)
+    if record is not None:
+        record.done.set()
+
+def _load_medicines():
+    """从文件读取药品列表"""
     if not os.path.exists(MEDICINES_FILE):
         return []
     with open(MEDICINES_FILE, 'r') as f:
-        return [line.strip() for line in f.readlines() if line.strip()]
+        return [line.strip() for line in f.read().splitlines() if line.strip()]
+
+def read_medicines():
+    """读取药品列表，优先返回内存缓存，避免每次请求都读文件"""
+    global _medicines_cache
+    with file_lock.read_lock():
+        if _medicines_cache is not None:
+            return list(_medicines_cache)
+    # 冷启动：从文件加载一次
+    with file_lock.write_lock():
+        if _medicines_cache is None:
+            _medicines_cache = _load_medicines()
+        return list(_medicines_cache)
 
 def write_medicines(medicines):
-    """写入药品列表"""
-    with open(MEDICINES_FILE, 'w') as f:
-        for medicine in medicines:
-            f.write(f"{medicine}\n")
+    """写入药品列表，同时刷新内存缓存
+
+    先写临时文件再 os.replace 原子替换，写入中途崩溃也不会留下截断的文件
+    """
+    global _medicines_cache
+    medicines = list(medicines)
+    with file_lock.read_lock():
+        # 内容未变化（如重复清空、抓取未取到药品）时跳过写文件
+        if medicines == _medicines_cache:
+            return
+    content = "".join(f"{medicine}\n" for medicine in medicines)
+    tmp_path = MEDICINES_FILE + ".tmp"
+    with file_lock.write_lock():
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, MEDICINES_FILE)
+        _medicines_cache = medicines
 
 @app.route('/prescription_recognition', methods=['POST'])
 def start_prescription_recognition():
@@ -41,8 +163,7 @@ def start_prescription_recognition():
             return jsonify({"error": "Another task is already running"}), 409
         is_task_running = True
     
-    task_id = str(uuid.uuid4())
-    tasks[task_id] = TASK_INCOMPLETE
+    task_id = create_task("prescription_recognition")
     
     def run_task():
         global is_task_running
@@ -50,13 +171,17 @@ def start_prescription_recognition():
             medicines = grasp_handler.process_prescription_recognition()
             if medicines:  # 只有在识别成功时才写入文件
                 write_medicines(medicines)
-            tasks[task_id] = TASK_COMPLETE
+            complete_task(task_id)
+        except Exception:
+            logger.exception(f"处方识别任务失败: {task_id}")
+            complete_task(task_id, TASK_FAILED)
         finally:
             # 确保任务完成后释放锁
             with task_lock:
                 is_task_running = False
+            finish_task(task_id)
     
-    threading.Thread(target=run_task).start()
+    executor.submit(run_task)
     return jsonify({"task_id": task_id})
 
 @app.route('/place_medicine_basket', methods=['POST'])
@@ -70,22 +195,26 @@ def place_medicine_basket():
             return jsonify({"error": "Another task is already running"}), 409
         is_task_running = True
     
-    task_id = str(uuid.uuid4())
-    tasks[task_id] = TASK_INCOMPLETE
+    task_id = create_task("place_medicine_basket")
 
     def run_task():
         global is_task_running
+        status = TASK_COMPLETE
         try:
             grasp_handler.place_medicine_basket()
+        except Exception:
+            logger.exception(f"放置药品篮子任务失败: {task_id}")
+            status = TASK_FAILED
         finally:
-            # 任务完成后清空药品列表
+            # 任务结束后清空药品列表
             write_medicines([])
-            tasks[task_id] = TASK_COMPLETE
+            complete_task(task_id, status)
             # 释放任务锁
             with task_lock:
                 is_task_running = False
+            finish_task(task_id)
 
-    threading.Thread(target=run_task).start()
+    executor.submit(run_task)
     return jsonify({"task_id": task_id})
 
 @app.route('/prescription_list', methods=['GET'])
@@ -107,8 +236,7 @@ def start_grasp():
             return jsonify({"error": "Another task is already running"}), 409
         is_task_running = True
     
-    task_id = str(uuid.uuid4())
-    tasks[task_id] = TASK_INCOMPLETE
+    task_id = create_task("start_grasp")
     
     def run_task():
         global is_task_running
@@ -116,24 +244,39 @@ def start_grasp():
             new_medicines = grasp_handler.process_grasp(medicines)
             if new_medicines is not None:  # 只有在抓取成功时才更新文件
                 write_medicines(new_medicines)
-            tasks[task_id] = TASK_COMPLETE
+            complete_task(task_id)
+        except Exception:
+            logger.exception(f"抓取任务失败: {task_id}")
+            complete_task(task_id, TASK_FAILED)
         finally:
             # 释放任务锁
             with task_lock:
                 is_task_running = False
+            finish_task(task_id)
     
-    threading.Thread(target=run_task).start()
+    executor.submit(run_task)
     return jsonify({"task_id": task_id})
 
 @app.route('/task_status/<task_id>', methods=['GET'])
 def get_task_status(task_id):
-    if task_id not in tasks:
+    """查询任务状态
+
+    可选参数 wait（秒）：任务未结束时阻塞等待其结束再返回，最长 MAX_STATUS_WAIT 秒，
+    客户端无需按固定间隔反复轮询。complete 和 failed 都是终止状态
+    """
+    with tasks_lock:
+        record = tasks.get(task_id)
+    if record is None:
         return jsonify({"error": "Task not found"}), 404
-    return jsonify({"status": tasks[task_id]})
+    wait = request.args.get('wait', default=0.0, type=float)
+    if wait > 0 and record.status == TASK_INCOMPLETE:
+        record.done.wait(min(wait, MAX_STATUS_WAIT))
+    return jsonify({"status": record.status})
 
 if __name__ == '__main__':
     # 确保文件存在
-    if not os.path.exists(MEDICINES_FILE):
-        open(MEDICINES_FILE, 'a').close()
+    Path(MEDICINES_FILE).touch(exist_ok=True)
+    # 清空药品列表，同时预热内存缓存
     write_medicines([])
-    app.run(host='0.0.0.0', port=5000)
+    # 每个请求独立线程处理，长轮询的 /task_status 不会阻塞其它请求
+    app.run(host='0.0.0.0', port=5000, threaded=True)
@@ -4,29 +4,47 @@ import time
 # 服务器地址
 BASE_URL = "http://localhost:5000"
 
+# 复用 HTTP 长连接，避免每次请求重新建立 TCP 连接
+session = requests.Session()
+
+# 任务终止状态
+TERMINAL_STATUSES = ("complete", "failed")
+
+def wait_task_complete(task_id):
+    """长轮询任务状态直到任务结束：服务端在任务结束或等待超时后才返回
+
+    服务端若提前返回（如不支持长轮询），两次查询之间按指数退避等待，避免频繁请求
+    """
+    delay = 0.5
+    while True:
+        status_response = session.get(f"{BASE_URL}/task_status/{task_id}", params={"wait": 30})
+        if status_response.status_code != 200:
+            print(f"查询任务状态失败: {status_response.status_code}")
+            return None
+        status = status_response.json()["status"]
+        print(f"任务状态: {status}")
+        if status in TERMINAL_STATUSES:
+            return status
+        time.sleep(delay)
+        delay = min(delay * 2, 5.0)
+
 def test_prescription_recognition():
     """测试处方识别接口"""
     print("\n=== 测试处方识别 ===")
-    response = requests.post(f"{BASE_URL}/prescription_recognition")
+    response = session.post(f"{BASE_URL}/prescription_recognition")
     if response.status_code == 200:
         task_id = response.json()["task_id"]
         print(f"开始处方识别任务，任务ID: {task_id}")
         
         # 轮询任务状态
-        while True:
-            status_response = requests.get(f"{BASE_URL}/task_status/{task_id}")
-            status = status_response.json()["status"]
-            print(f"任务状态: {status}")
-            if status == "complete":
-                break
-            time.sleep(2)
+        wait_task_complete(task_id)
     else:
         print(f"处方识别请求失败: {response.status_code}")
 
 def test_get_prescription_list():
     """测试获取处方列表接口"""
     print("\n=== 测试获取处方列表 ===")
-    response = requests.get(f"{BASE_URL}/prescription_list")
+    response = session.get(f"{BASE_URL}/prescription_list")
     if response.status_code == 200:
         prescriptions = response.json()["prescriptions"]
         print("处方列表:")
@@ -38,38 +56,26 @@ def test_get_prescription_list():
 def test_start_grasp():
     """测试开始抓取接口"""
     print("\n=== 测试开始抓取 ===")
-    response = requests.post(f"{BASE_URL}/start_grasp")
+    response = session.post(f"{BASE_URL}/start_grasp")
     if response.status_code == 200:
         task_id = response.json()["task_id"]
         print(f"开始抓取任务，任务ID: {task_id}")
         
         # 轮询任务状态
-        while True:
-            status_response = requests.get(f"{BASE_URL}/task_status/{task_id}")
-            status = status_response.json()["status"]
-            print(f"任务状态: {status}")
-            if status == "complete":
-                break
-            time.sleep(2)
+        wait_task_complete(task_id)
     else:
         print(f"开始抓取请求失败: {response.status_code}")
 
 def test_place_medicine_basket():
     """测试放置药品框接口"""
     print("\n=== 测试放置药品框 ===")
-    response = requests.post(f"{BASE_URL}/place_medicine_basket")
+    response = session.post(f"{BASE_URL}/place_medicine_basket")
     if response.status_code == 200:
         task_id = response.json()["task_id"]
         print(f"开始放置药品框任务，任务ID: {task_id}")
 
         # 轮询任务状态
-        while True:
-            status_response = requests.get(f"{BASE_URL}/task_status/{task_id}")
-            status = status_response.json()["status"]
-            print(f"任务状态: {status}")
-            if status == "complete":
-                break
-            time.sleep(2)
+        wait_task_complete(task_id)
     else:
         print(f"放置药品框请求失败: {response.status_code}")
 
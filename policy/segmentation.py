@@ -4,6 +4,7 @@ from ultralytics import YOLO
 from ultralytics.models.sam import Predictor as SAMPredictor
 from typing import Optional, Tuple, List, Dict, Union
 import os
+import hashlib
 
 def save_image(image: np.ndarray, path: str):
     cv2.imwrite(path, image)
@@ -20,18 +21,42 @@ class YoloDetector:
         threshold: 置信度阈值，用于过滤低置信度的检测结果
     """
     
-    def __init__(self, model_path: str , threshold: float = 0.25):
+    def __init__(self, model_path: str , threshold: float = 0.25, use_tensorrt: bool = False,
+                 int8_data: Optional[str] = None):
         """
         初始化YOLO检测器
         
         Args:
-            model_path (str): YOLO模型文件的路径
+            model_path (str): YOLO模型文件的路径，也可以直接传入导出好的 .engine 文件
             threshold (float, optional): 置信度阈值，默认为0.25
+            use_tensorrt (bool, optional): 为 True 且传入 .pt 时，导出 TensorRT FP16 引擎并加载，
+                                           引擎缓存在权重同目录下，之后直接复用
+            int8_data (Optional[str], optional): 校准数据集 yaml 路径，与 use_tensorrt 同时给出时导出 INT8 引擎。
+                                                 相机视角固定、光照稳定，用现场采集的画面校准即可
         """
+        if use_tensorrt and model_path.endswith(".pt"):
+            model_path = self._export_engine(model_path, int8_data)
         self.model = YOLO(model_path)
         self.threshold = threshold
+        # 当前已设置的检测类别，类别不变时不再重复 set_classes（YOLO-World 每次都会重新编码类别文本）
+        self._current_classes = None
 
-    def detect(self, image_or_path: Union[str, np.ndarray], target_class: Optional[str] = None) -> Tuple[List[Dict], np.ndarray]:
+    @staticmethod
+    def _export_engine(model_path: str, int8_data: Optional[str] = None, imgsz: int = 640) -> str:
+        """导出 TensorRT 引擎（默认FP16，给出校准数据时为INT8），已存在时直接返回引擎路径"""
+        precision = "int8" if int8_data else "fp16"
+        # 引擎与精度、输入尺寸、动态batch绑定，缓存文件名包含这些参数，不同配置的引擎互不覆盖
+        engine_path = f"{os.path.splitext(model_path)[0]}_{precision}_{imgsz}_dynamic.engine"
+        if not os.path.exists(engine_path):
+            if int8_data:
+                exported = YOLO(model_path).export(format="engine", int8=True, data=int8_data, dynamic=True, imgsz=imgsz)
+            else:
+                exported = YOLO(model_path).export(format="engine", half=True, dynamic=True, imgsz=imgsz)
+            # ultralytics 导出文件固定命名为 <权重名>.engine，改名为带参数的缓存文件名
+            os.replace(exported, engine_path)
+        return engine_path
+
+    def detect(self, image_or_path: Union[str, np.ndarray], target_class: Optional[str] = None, plot: bool = True) -> Tuple[List[Dict], Optional[np.ndarray]]:
         """
         执行目标检测
         
@@ -42,11 +67,12 @@ class YoloDetector:
             image_or_path (Union[str, np.ndarray]): 输入图像，可以是图像路径字符串或numpy数组
                                                    numpy数组必须是OpenCV的BGR格式
             target_class (Optional[str], optional): 指定要检测的目标类别，如果为None则检测所有类别
+            plot (bool, optional): 是否绘制可视化图像，不需要时设为False可省去绘制开销
         
         Returns:
-            Tuple[List[Dict], np.ndarray]: 
+            Tuple[List[Dict], Optional[np.ndarray]]: 
                 - 检测结果列表，每个字典包含检测框坐标(xyxy)、置信度(conf)和类别(cls)
-                - 可视化图像，包含检测框和标签的标注图像
+                - 可视化图像，包含检测框和标签的标注图像；plot为False时为None
         
         Note:
             - 检测框坐标格式为 [x1, y1, x2, y2]，其中(x1,y1)为左上角，(x2,y2)为右下角
@@ -61,26 +87,57 @@ class YoloDetector:
             image = image_or_path
 
         # 如果指定了目标类别，则设置模型只检测该类别
-        if target_class:
-            self.model.set_classes([target_class])
+        self._set_target_class(target_class)
 
         # 执行YOLO检测
         results = self.model.predict(image)
 
+        return self._parse_result(results[0], plot)
+
+    def detect_batch(self, images: List[np.ndarray], target_class: Optional[str] = None, plot: bool = True) -> List[Tuple[List[Dict], Optional[np.ndarray]]]:
+        """
+        批量目标检测
+
+        多帧图像一次送入模型，共用一次前向推理，减少逐帧调用的开销。
+
+        Args:
+            images (List[np.ndarray]): OpenCV BGR 格式的图像列表
+            target_class (Optional[str], optional): 指定要检测的目标类别，如果为None则检测所有类别
+            plot (bool, optional): 是否绘制可视化图像
+
+        Returns:
+            List[Tuple[List[Dict], Optional[np.ndarray]]]: 与输入顺序一一对应的 (检测结果列表, 可视化图像)
+        """
+        if not images:
+            return []
+        self._set_target_class(target_class)
+
+        results = self.model.predict(list(images), batch=len(images))
+        return [self._parse_result(result, plot) for result in results]
+
+    def _set_target_class(self, target_class: Optional[str]):
+        """设置检测类别，与上次相同时跳过"""
+        if target_class and target_class != self._current_classes:
+            self.model.set_classes([target_class])
+            self._current_classes = target_class
+
+    def _parse_result(self, result, plot: bool = True) -> Tuple[List[Dict], Optional[np.ndarray]]:
+        """从单张图像的YOLO结果中提取超过阈值的检测框和可视化图像"""
         # 获取检测框和可视化结果
-        boxes = results[0].boxes
-        vis_img = results[0].plot()  # 获取可视化检测结果
-
-        # 提取有效的检测结果
-        valid_boxes = []
-        for box in boxes:
-            # 只保留置信度超过阈值的检测结果
-            if box.conf.item() > self.threshold:
-                valid_boxes.append({
-                    "xyxy": box.xyxy[0].tolist(),  # 检测框坐标 [x1, y1, x2, y2]
-                    "conf": box.conf.item(),        # 置信度
-                    "cls": results[0].names[box.cls.item()]  # 类别名称
-                })
+        boxes = result.boxes
+        vis_img = result.plot() if plot else None  # 获取可视化检测结果
+
+        # 一次性把所有检测框拷回主机，避免逐框 .item() 触发的同步和拷贝
+        confs = boxes.conf.cpu().numpy()
+        clses = boxes.cls.cpu().numpy().astype(int)
+        xyxy = boxes.xyxy.cpu().numpy()
+
+        # 只保留置信度超过阈值的检测结果
+        valid_boxes = [{
+            "xyxy": xyxy[i].tolist(),         # 检测框坐标 [x1, y1, x2, y2]
+            "conf": float(confs[i]),          # 置信度
+            "cls": result.names[clses[i]]     # 类别名称
+        } for i in np.flatnonzero(confs > self.threshold)]
 
         return valid_boxes, vis_img
   
@@ -95,12 +152,13 @@ class SamPredictor:
         model: SAMPredictor模型实例
         overrides: 模型配置参数字典
     """
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, half: bool = False):
         """
         初始化SAM分割预测器
         
         Args:
             model_path (str): SAM模型文件的路径
+            half (bool, optional): 是否以 FP16 推理，仅在 CUDA 设备上生效
         """
         self.overrides = {
             'task': 'segment',    
@@ -108,9 +166,24 @@ class SamPredictor:
             # 'imgsz': 1024,      
             'model': model_path,  
             'conf': 0.01,         
-            'save': False         
+            'save': False,
+            'half': half
         }
         self.model = SAMPredictor(overrides=self.overrides)
+        # 上一次 set_image 的图像指纹，同一帧重复提示时跳过 SAM 编码器
+        self._last_key = None
+
+    @staticmethod
+    def _image_key(image: np.ndarray) -> bytes:
+        """图像指纹：对隔行隔列采样的像素做哈希，比哈希整幅图像便宜得多"""
+        sample = np.ascontiguousarray(image[::4, ::4])
+        h = hashlib.blake2b(str(image.shape).encode(), digest_size=16)
+        h.update(sample.tobytes())
+        return h.digest()
+
+    def invalidate(self):
+        """清除图像编码缓存，下次 predict 强制重新 set_image"""
+        self._last_key = None
 
     @staticmethod
     def process_sam_results(results):
@@ -129,21 +202,19 @@ class SamPredictor:
             return None, None
 
         # Get first mask (assuming single object segmentation)
-        mask = results[0].masks.data[0].cpu().numpy()
-        mask = (mask > 0).astype(np.uint8) * 255
+        # 在掩码所在设备上先阈值化，只把 1 字节/像素的布尔掩码拷回主机
+        foreground = (results[0].masks.data[0] > 0).cpu().numpy()
 
-        # Find contour and center
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        if not contours:
+        # 直接由前景像素求质心，无需先提取轮廓
+        idx = np.flatnonzero(foreground)
+        if idx.size == 0:
             return None, None
 
-        M = cv2.moments(contours[0])
-        if M["m00"] == 0:
-            return None, mask
-
-        cx = int(M["m10"] / M["m00"])
-        cy = int(M["m01"] / M["m00"])
-        return (cx, cy), mask
+        # 布尔数组按 uint8 原地视图放大到 0/255，不再额外分配数组
+        mask = foreground.view(np.uint8)
+        mask *= 255
+        cy, cx = np.divmod(idx, mask.shape[1])
+        return (int(cx.mean()), int(cy.mean())), mask
 
 
     def predict(self, image_or_path: Union[str, np.ndarray], bboxes: List[int] = None, points: List[int] = None):
@@ -155,7 +226,7 @@ class SamPredictor:
         - points: 必须为长度为2的列表[x, y]，表示分割点的坐标。
         
         Args:
-            image_or_path (Union[str, np.ndarray]): 输入图像，可以是图像路径字符串或numpy数组（RGB格式）。
+            image_or_path (Union[str, np.ndarray]): 输入图像，可以是图像路径字符串或numpy数组（OpenCV的BGR格式）。
             bboxes (List[int], optional): 长度为4的边界框坐标列表[x1, y1, x2, y2]。
             points (List[int], optional): 长度为2的点坐标列表[x, y]。
         
@@ -164,14 +235,18 @@ class SamPredictor:
                 - 分割区域的中心点坐标(cx, cy)，如果未检测到则为None
                 - 分割掩码（uint8类型，255为前景，0为背景），如果未检测到则为None
         """
-        # 必须是rgb格式
+        # Ultralytics 的 SAM 预处理按 OpenCV 约定把输入数组视为 BGR 并自行转换通道，
+        # 直接传入 BGR 图像，调用方无需再做一次整幅图像的 cvtColor
         if isinstance(image_or_path, str):
             bgr_img = cv2.imread(image_or_path)
-            rgb_img = cv2.cvtColor(bgr_img, cv2.COLOR_BGR2RGB)
         else:
-            rgb_img = image_or_path
+            bgr_img = image_or_path
 
-        self.model.set_image(rgb_img)
+        # 同一帧只编码一次，换提示（点/框）重试时复用已有的图像特征
+        key = self._image_key(bgr_img)
+        if key != self._last_key:
+            self.model.set_image(bgr_img)
+            self._last_key = key
 
         # 检查points和bboxes的格式
         if points is not None:
@@ -0,0 +1,110 @@
+import sys
+import os
+import logging
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grasp_task2.grasp_task import GraspTask
+
+
+def _make_task(grasp):
+    """跳过硬件初始化创建 GraspTask，single_medicine_grasp 替换为桩函数"""
+    task = GraspTask.__new__(GraspTask)
+    task.logger = logging.getLogger("test_arm_grasp_loop")
+    task.single_medicine_grasp = grasp
+    return task
+
+
+def _make_items(names):
+    return [{"name": m, "done": False, "claimed_by": None, "tried": set()} for m in names]
+
+
+def _start_loop(task, items, arm_side, cond):
+    thread = threading.Thread(target=task._arm_grasp_loop, args=(items, arm_side, cond), daemon=True)
+    thread.start()
+    return thread
+
+
+def test_failed_medicine_is_retried_by_other_arm():
+    """一只臂抓取失败的药品由另一只臂重试"""
+    calls = []
+    right_started = threading.Event()
+
+    def grasp(medicine, arm_side="right", upcoming=None):
+        calls.append((arm_side, medicine))
+        if arm_side == "right":
+            right_started.set()
+            return False
+        return True
+
+    task = _make_task(grasp)
+    items = _make_items(["A"])
+    cond = threading.Condition()
+    right = _start_loop(task, items, "right", cond)
+    # 右臂先认领药品，左臂随后启动，只能等右臂失败后再认领
+    assert right_started.wait(timeout=5)
+    left = _start_loop(task, items, "left", cond)
+    right.join(timeout=5)
+    left.join(timeout=5)
+
+    assert not right.is_alive() and not left.is_alive()
+    assert calls == [("right", "A"), ("left", "A")]
+    assert items[0]["done"]
+
+
+def test_both_arms_fail_without_deadlock():
+    """两只臂都抓取失败时都能退出，每个药品每只臂各尝试一次"""
+    calls = []
+    calls_lock = threading.Lock()
+
+    def grasp(medicine, arm_side="right", upcoming=None):
+        with calls_lock:
+            calls.append((arm_side, medicine))
+        time.sleep(0.01)
+        return False
+
+    task = _make_task(grasp)
+    items = _make_items(["A", "B", "C"])
+    cond = threading.Condition()
+    threads = [_start_loop(task, items, arm_side, cond) for arm_side in ("right", "left")]
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert all(not item["done"] and item["tried"] == {"left", "right"} for item in items)
+    assert sorted(calls) == sorted((arm, m) for arm in ("left", "right") for m in ("A", "B", "C"))
+
+
+def test_medicine_claimed_by_one_arm_at_a_time():
+    """同一药品同一时间只被一只机械臂抓取，成功后不再被另一只臂抓取"""
+    active = set()
+    overlaps = []
+    calls = []
+    state_lock = threading.Lock()
+
+    def grasp(medicine, arm_side="right", upcoming=None):
+        with state_lock:
+            if medicine in active:
+                overlaps.append(medicine)
+            active.add(medicine)
+            calls.append((arm_side, medicine))
+        time.sleep(0.02)
+        with state_lock:
+            active.discard(medicine)
+        # 右臂抓不到偶数编号的药品，交给左臂重试
+        return not (arm_side == "right" and int(medicine[1:]) % 2 == 0)
+
+    task = _make_task(grasp)
+    names = [f"m{i}" for i in range(8)]
+    items = _make_items(names)
+    cond = threading.Condition()
+    threads = [_start_loop(task, items, arm_side, cond) for arm_side in ("right", "left")]
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert overlaps == []
+    assert all(item["done"] and item["claimed_by"] is None for item in items)
+    # 每只臂对同一药品最多尝试一次
+    assert len(calls) == len(set(calls))
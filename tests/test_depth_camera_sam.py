@@ -108,11 +108,8 @@ class DepthCameraSamTest:
             if data and "color" in data:
                 color_image = data["color"]
                 
-                # 转换为RGB格式（SAM需要RGB格式）
-                rgb_image = cv2.cvtColor(color_image, cv2.COLOR_BGR2RGB)
-                
-                # 执行SAM分割
-                center, mask = self.sam_predictor.predict(rgb_image, points=[x, y])
+                # 执行SAM分割（直接使用BGR图像）
+                center, mask = self.sam_predictor.predict(color_image, points=[x, y])
                 
                 if mask is not None:
                     self.current_mask = mask
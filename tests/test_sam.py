@@ -61,8 +61,6 @@ def test_sam_point():
     if clicked_point:
         print(f"选择的点: {clicked_point}")
         sam = SamPredictor(sam_model_path)
-        # 将img转换为rgb格式
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         center, mask = sam.predict(img, points=clicked_point)
         # 或者直接用image_path
         # center, mask = sam.predict(image_path, points=clicked_point)
@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
 
 from typing import Optional, Dict
-import numpy as np
-from Robot.sensor.depth_camera import RealsenseSensor
 
 class GraspConfig:
     def __init__(self):
@@ -32,6 +30,9 @@ class GraspConfig:
         # 处方rgb相机参数
         self.rgb_camera_id = 6
 
+        # 无界面模式：AI选点成功后直接返回，不创建显示窗口
+        self.headless = False
+
         # 其他配置参数
         self.sam_model_path = "/home/gml-cwl/code/robot2/assets/weights/sam_l.pt"        
    
@@ -119,10 +119,8 @@ class GraspTask:
             return False
         
         try:
-            # 将图像转换为RGB格式
-            rgb_image = cv2.cvtColor(self.image_handler.last_color_image, cv2.COLOR_BGR2RGB)
-            # 使用SAM模型进行分割
-            center, mask = self.sam_model.predict(rgb_image, points=self.point_selector.selected_point)
+            # 使用SAM模型进行分割（直接使用BGR图像）
+            center, mask = self.sam_model.predict(self.image_handler.last_color_image, points=self.point_selector.selected_point)
             # 如果分割成功，则显示分割结果
             if mask is not None:
                 self.mask_result = mask
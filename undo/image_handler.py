@@ -6,6 +6,7 @@ import numpy as np
 from typing import Tuple, Optional
 from Robot.sensor.depth_camera import RealsenseSensor
 from grasp_task.config import GraspConfig
+from utils.others import get_images
 
 class ImageHandler:
     def __init__(self, config: 'GraspConfig', logger: 'logging.Logger'):
@@ -30,22 +31,27 @@ class ImageHandler:
     
     def get_images(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
         """获取彩色和深度图像"""
-        try:
-            data = self.sensor.get_information()
-            if data and "color" in data and "depth" in data:
-                self.last_color_image = data["color"].copy()
-                self.last_depth_image = data["depth"].copy()
-                return self.last_color_image, self.last_depth_image
-            return None, None
-        except Exception as e:
-            self.logger.error(f"获取图像失败: {str(e)}")
-            return None, None
+        color, depth = get_images(self.sensor, self.logger)
+        if color is not None:
+            self.last_color_image = color
+            self.last_depth_image = depth
+        return color, depth
 
-    def draw_point(self, image: np.ndarray, point: list) -> np.ndarray:
-        """在图像上绘制点"""
+    def draw_point(self, image: np.ndarray, point: list, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """在图像上绘制点
+
+        Args:
+            image: 原始图像，不会被修改
+            point: 待绘制的点 [x, y]
+            out: 可选的预分配显示缓冲区，形状需与image一致；提供时直接在其上绘制，避免每帧分配新图像
+        """
+        if out is None:
+            display_img = image.copy()
+        else:
+            np.copyto(out, image)
+            display_img = out
         if point:
             x, y = point
-            display_img = image.copy()
             cv2.circle(display_img, (x, y), 6, (0, 255, 0), 2)
             cv2.circle(display_img, (x, y), 1, (0, 255, 0), -1)
             
@@ -61,8 +67,7 @@ class ImageHandler:
                 depth_text = f"Depth: {depth_cm:.1f}cm"
                 cv2.putText(display_img, depth_text, (x+15, y+5), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-            return display_img
-        return image.copy()
+        return display_img
 
     def cleanup(self):
         """清理资源"""
@@ -26,6 +26,8 @@ class PointSelector:
         self.selected_point: List[int] = [320, 240]  # 默认中心点
         self.window_name: str = "Point Selection"
         self.vision_api = llm_api
+        self.headless: bool = image_handler.config.headless
+        self._scratch: Optional[np.ndarray] = None  # 复用的显示缓冲区，首帧时按图像尺寸分配
 
     def mouse_callback(self, event: int, x: int, y: int, flags: int, param: Any) -> None:
         """
@@ -42,6 +44,12 @@ class PointSelector:
             self.selected_point = [x, y]
             self.logger.info(f"用户选择点: ({x}, {y})")
 
+    def _get_scratch(self, image: np.ndarray) -> np.ndarray:
+        """获取与图像尺寸一致的显示缓冲区，仅在首帧或分辨率变化时分配"""
+        if self._scratch is None or self._scratch.shape != image.shape or self._scratch.dtype != image.dtype:
+            self._scratch = np.empty_like(image)
+        return self._scratch
+
     def manual_select(self) -> bool:
         """
         手动选择点
@@ -63,7 +71,7 @@ class PointSelector:
                 self.logger.warning("无法获取图像，重试中...")
                 continue
             
-            display_img = self.image_handler.draw_point(color_img, self.selected_point)
+            display_img = self.image_handler.draw_point(color_img, self.selected_point, out=self._get_scratch(color_img))
             cv2.putText(display_img, "Click to select point, Enter to continue", 
                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
             cv2.imshow(self.window_name, display_img)
@@ -119,9 +127,13 @@ class PointSelector:
             else:
                 self.logger.error(f"未能有效识别药品 '{medicine_name}'")
                 return False
+
+            # 无界面模式下跳过显示和按键等待
+            if self.headless:
+                return True
             
             # 显示选择结果
-            display_img = self.image_handler.draw_point(color_img, self.selected_point)
+            display_img = self.image_handler.draw_point(color_img, self.selected_point, out=self._get_scratch(color_img))
             cv2.putText(display_img, "AI selected point, Press Enter to continue", 
                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
             cv2.imshow(self.window_name, display_img)
@@ -137,5 +149,6 @@ class PointSelector:
                     
         except Exception as e:
             self.logger.error(f"AI选择点时发生错误: {str(e)}")
-            cv2.destroyAllWindows()
+            if not self.headless:
+                cv2.destroyAllWindows()
             return False
@@ -79,9 +79,9 @@ class RobotController:
 
         try:
             self.suction.suck()
-            self.robot.set_pose_block(self.grasp_pose[1], linear=False)
+            self.robot.movej_block(self.grasp_pose[1])
             time.sleep(2)
-            self.robot.set_pose_block(self.grasp_pose[2], linear=True)
+            self.robot.movel_block(self.grasp_pose[2])
             time.sleep(2)
             return True
         except Exception as e:
@@ -95,7 +95,7 @@ class RobotController:
             bool: 复位是否成功
         """
         try:
-            self.robot.set_pose_block(self.grasp_pose[1], linear=True)
+            self.robot.movel_block(self.grasp_pose[1])
             time.sleep(1.5)
             self.robot.set_arm_init_joint()
             time.sleep(1.5)
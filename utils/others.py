@@ -1,3 +1,5 @@
+import os
+import hashlib
 import numpy as np
 import cv2
 from typing import Tuple, Optional
@@ -75,8 +77,50 @@ def print_grasp_poses(above_pose, correct_pose, finally_pose , logger = None):
                 print()
 
 
+def compute_dhash(image: np.ndarray) -> bytes:
+    """
+    计算图像的差值哈希(dHash)，用作缓存键
+
+    先缩放到9x8灰度图，再比较水平相邻像素得到64位指纹，全部由OpenCV/NumPy向量化完成
+
+    Args:
+        image: BGR彩色图像或灰度图像
+
+    Returns:
+        bytes: 8字节的哈希值，相同画面得到相同结果
+    """
+    small = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    diff = gray[:, 1:] > gray[:, :-1]
+    return np.packbits(diff.ravel()).tobytes()
+
+
+def compute_image_key(image: np.ndarray, stride: int = 4) -> bytes:
+    """
+    计算图像内容的精确哈希，用作缓存键
+
+    对隔 stride 行、列采样的像素做 blake2b 哈希，比哈希整幅图像便宜得多；
+    与 compute_dhash 不同，相似但不相同的画面得到不同结果，不会误命中其他场景的缓存
+
+    Args:
+        image: 任意形状的图像数组
+        stride: 采样步长
+
+    Returns:
+        bytes: 16字节的哈希值
+    """
+    sample = np.ascontiguousarray(image[::stride, ::stride])
+    h = hashlib.blake2b(str(image.shape).encode(), digest_size=16)
+    h.update(sample.tobytes())
+    return h.digest()
+
+
 def get_images(sensor, logger) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
-        """获取彩色和深度图像"""
+        """获取彩色和深度图像
+
+        传感器返回的数组是 librealsense 帧缓冲区的零拷贝视图，持有期间会占用相机帧池中的缓冲区；
+        调用方会长时间持有图像（批量识别、调试图片写盘等），因此在这里拷贝一份，尽早归还帧缓冲区
+        """
         try:
             data = sensor.get_information()
             if data and "color" in data and "depth" in data:
@@ -88,6 +132,54 @@ def get_images(sensor, logger) -> Tuple[Optional[np.ndarray], Optional[np.ndarra
             logger.error(f"获取图像失败: {str(e)}")
             return None, None
 
+def window_depth(depth_frame: np.ndarray, x: int, y: int, radius: int = 3, min_valid: int = 1) -> float:
+    """
+    取 (x, y) 周围 (2*radius+1)^2 邻域内非零深度的中值
+
+    RealSense 的深度空洞通常是局部的，取邻域中值比单点读取更稳定，
+    也避免因单个像素为0而反复重新采集整帧
+
+    Args:
+        depth_frame: 深度图
+        x: 像素列坐标
+        y: 像素行坐标
+        radius: 邻域半径，默认3即7x7窗口
+        min_valid: 至少需要的非零像素数，不足时视为无效
+
+    Returns:
+        float: 邻域非零深度中值，有效像素不足时返回0.0
+    """
+    window = depth_frame[max(0, y - radius):y + radius + 1, max(0, x - radius):x + radius + 1]
+    nz = window[window > 0]
+    if nz.size < min_valid:
+        return 0.0
+    # 只需中间元素，用partition选择代替完整排序
+    k = nz.size // 2
+    return float(np.partition(nz, k)[k])
+
+def debug_imwrite(path: str, image: np.ndarray) -> bool:
+    """
+    保存调试图片，使用偏向编码速度的参数
+
+    JPEG 使用质量80且不做哈夫曼表优化，PNG 使用压缩等级1，
+    调试快照不需要默认的高质量/高压缩，编码耗时约减半
+
+    Args:
+        path: 输出路径，按扩展名选择编码参数
+        image: 要保存的图片
+
+    Returns:
+        bool: 是否保存成功
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jpg", ".jpeg"):
+        params = [cv2.IMWRITE_JPEG_QUALITY, 80, cv2.IMWRITE_JPEG_OPTIMIZE, 0]
+    elif ext == ".png":
+        params = [cv2.IMWRITE_PNG_COMPRESSION, 1]
+    else:
+        params = []
+    return cv2.imwrite(path, image, params)
+
 def mark_detected_medicine_on_image(image: np.ndarray, bbox: list, depth: float,
                                    medicine_name: str, output_path: str) -> None:
     """
@@ -137,4 +229,4 @@ def mark_detected_medicine_on_image(image: np.ndarray, bbox: list, depth: float,
     cv2.putText(marked_image, depth_info, (10, text_y_start + 2*line_height), font, font_scale, color, thickness)
     
     # 保存图片
-    cv2.imwrite(output_path, marked_image)
\ No newline at end of file
+    debug_imwrite(output_path, marked_image)
\ No newline at end of file